@@ -8,7 +8,7 @@ from app.database import get_db
 from app.models import Campaign, Lead, CampaignLead, ProcessingLog
 from app.models.campaign import CampaignStatus
 from app.schemas import CampaignCreate, CampaignUpdate, CampaignResponse, CampaignWithLeads
-from app.tasks.campaign_tasks import enqueue_campaign_processing
+from app.tasks.campaign_tasks import enqueue_campaign_processing, set_campaign_paused
 
 router = APIRouter(prefix="/campaigns", tags=["campaigns"])
 
@@ -215,6 +215,7 @@ def pause_campaign(campaign_id: int, db: Session = Depends(get_db)):
     
     campaign.status = CampaignStatus.PAUSED
     db.commit()
+    set_campaign_paused(campaign_id)
     
     return {"message": "Campaign paused", "campaign_id": campaign_id}
 
@@ -1,14 +1,14 @@
 """API endpoints for prompt builder / recording analysis."""
 import os
 import logging
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from pathlib import Path
 import shutil
-import asyncio
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, get_db_no_expire
 from app.models.recording import Recording, Transcript, Analysis, GeneratedPrompt, RecordingStatus
 from app.schemas.recording import (
     RecordingResponse,
@@ -17,7 +17,7 @@ from app.schemas.recording import (
     GeneratedPromptUpdate,
     ProcessingStatusResponse
 )
-from app.tasks.recording_processor import process_recording_task
+from app.tasks.recording_processor import enqueue_recording_processing
 from app.services.prompt_chat import PromptChatService
 from app.schemas.prompt_chat import ChatSessionResponse, ChatMessageCreate, ChatMessageResponse, SavePromptRequest
 
@@ -25,14 +25,13 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["prompt-builder"])
 
-# Upload directory
-UPLOAD_DIR = Path("/Users/nicholas/Desktop/NMG/fastapi-langgraph-poc/backend/uploads/recordings")
+# Upload directory; must be shared with the recording worker, which reads the files
+UPLOAD_DIR = Path(__file__).resolve().parents[2] / settings.UPLOAD_DIR
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 
 @router.post("/recordings/upload", response_model=RecordingResponse)
 async def upload_recording(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -79,10 +78,8 @@ async def upload_recording(
         db.commit()
         db.refresh(recording)
         
-        # Queue background processing
-        # Note: Using asyncio.create_task instead of RQ for simplicity
-        # In production, use RQ worker
-        asyncio.create_task(process_recording_async(recording.id, db))
+        # Queue background processing on the recordings worker
+        enqueue_recording_processing(recording.id)
         
         logger.info(f"Uploaded recording {recording.id}: {file.filename}")
         
@@ -93,14 +90,6 @@ async def upload_recording(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def process_recording_async(recording_id: int, db: Session):
-    """Wrapper to process recording in background."""
-    try:
-        await process_recording_task(recording_id, db)
-    except Exception as e:
-        logger.error(f"Background processing failed for recording {recording_id}: {str(e)}")
-
-
 @router.get("/recordings", response_model=List[RecordingResponse])
 def list_recordings(
     skip: int = 0,
@@ -269,10 +258,14 @@ async def regenerate_prompt(
     prompt_service = PromptGeneratorService()
     
     if feedback:
-        # Refine based on feedback
-        new_prompt_text = await prompt_service.refine_prompt(prompt.prompt_text, feedback)
+        # Refine based on feedback (skip the cache so a new variant is produced)
+        new_prompt_text = await prompt_service.refine_prompt(
+            prompt.prompt_text,
+            feedback,
+            use_cache=False
+        )
     else:
-        # Regenerate from scratch
+        # Regenerate from scratch (skip the cache so a new variant is produced)
         analysis_data = {
             "tonality_description": analysis.tonality_description,
             "communication_style": analysis.communication_style,
@@ -285,7 +278,8 @@ async def regenerate_prompt(
         }
         new_prompt_text = await prompt_service.generate_system_prompt(
             transcript.full_text,
-            analysis_data
+            analysis_data,
+            use_cache=False
         )
     
     # Create new version
@@ -310,7 +304,7 @@ async def regenerate_prompt(
 
 
 @router.post("/chat/start", response_model=ChatSessionResponse)
-async def start_chat_session(db: Session = Depends(get_db)):
+async def start_chat_session(db: Session = Depends(get_db_no_expire)):
     """Start a new interactive prompt building session."""
     service = PromptChatService(db)
     return await service.create_session()
@@ -320,7 +314,7 @@ async def start_chat_session(db: Session = Depends(get_db)):
 async def send_chat_message(
     session_id: int, 
     message: ChatMessageCreate, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_no_expire)
 ):
     """Send a message to the chat session."""
     service = PromptChatService(db)
@@ -331,7 +325,7 @@ async def send_chat_message(
 async def send_chat_message_stream(
     session_id: int, 
     message: ChatMessageCreate, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_no_expire)
 ):
     """Send a message to the chat session with streaming response."""
     from fastapi.responses import StreamingResponse
@@ -357,7 +351,7 @@ def save_chat_prompt(
 @router.post("/chat/{session_id}/finalize", response_model=GeneratedPromptResponse)
 async def finalize_chat_session(
     session_id: int, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_no_expire)
 ):
     """Finalize the chat session and generate the system prompt."""
     service = PromptChatService(db)
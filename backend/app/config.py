@@ -32,6 +32,9 @@ class Settings(BaseSettings):
     WORKING_HOURS_END: int = 23  # 11 PM (23:00)
     ALLOW_WEEKEND_SENDING: bool = True
     
+    # Uploads (relative paths resolve against the backend directory)
+    UPLOAD_DIR: str = "uploads/recordings"
+    
     # App Settings
     DEBUG: bool = True
     LOG_LEVEL: str = "INFO"
@@ -5,12 +5,16 @@ from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
 # Create database engine
+# Connections are recycled before typical server-side idle timeouts and
+# pinged on checkout, so long-lived workers don't hit dropped sockets.
 engine = create_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
     pool_pre_ping=True,
     pool_size=10,
-    max_overflow=20,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_recycle=3600,
 )
 
 # Create session factory
@@ -28,3 +32,15 @@ def get_db():
     finally:
         db.close()
 
+
+def get_db_no_expire():
+    """Dependency for a session that keeps loaded state after commit.
+    
+    For async endpoints that commit in a worker thread and keep reading the
+    same objects on the event loop, where an expired attribute would reload.
+    """
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,9 +1,13 @@
 """FastAPI application entry point."""
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import campaigns, leads, dashboard, settings, workflows, conversations, traces, agents, campaign_leads, prompt_builder
 from app.database import Base, engine
+from app.services.elevenlabs import close_elevenlabs_service
+from app.services.openai_client import close_openai_client
+from app.services.sms_service import close_sms_http_client
 
 # Configure logging
 logging.basicConfig(
@@ -15,12 +19,23 @@ logger = logging.getLogger(__name__)
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release shared HTTP clients on shutdown."""
+    yield
+    await close_elevenlabs_service()
+    await close_openai_client()
+    await close_sms_http_client()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="FastAPI LangGraph POC",
     description="SMS Campaign Management with LangGraph",
     version="1.0.0",
-    redirect_slashes=False  # Prevent 307 redirects that leak Docker hostnames
+    redirect_slashes=False,  # Prevent 307 redirects that leak Docker hostnames
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -1,6 +1,6 @@
 """CampaignLead model."""
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index
+from sqlalchemy.sql import false, func, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -9,6 +9,15 @@ class CampaignLead(Base):
     """CampaignLead model linking campaigns to leads with processing status."""
     
     __tablename__ = "campaign_leads"
+    __table_args__ = (
+        # Partial index for the pending-leads lookup at campaign start
+        Index(
+            "idx_campaign_leads_campaign_status",
+            "campaign_id",
+            "status",
+            postgresql_where=text("status = 'pending'")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -28,7 +37,7 @@ class CampaignLead(Base):
     error_message = Column(Text, nullable=True)
     
     # Manual mode for human takeover
-    manual_mode = Column(Boolean, default=False)  # When True, AI won't auto-respond
+    manual_mode = Column(Boolean, nullable=False, default=False, server_default=false())  # When True, AI won't auto-respond
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
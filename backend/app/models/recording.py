@@ -2,6 +2,7 @@
 from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, Float, Enum as SQLEnum, ForeignKey
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.mutable import MutableList
 from app.database import Base
 import enum
 
@@ -120,7 +121,10 @@ class PromptChatSession(Base):
     id = Column(Integer, primary_key=True, index=True)
     
     # Chat State
-    messages = Column(JSON, nullable=False, default=[])  # List of {role: str, content: str}
+    messages = Column(MutableList.as_mutable(JSON), nullable=False, default=[])  # List of {role: str, content: str}
+    draft_prompt = Column(Text, nullable=True)  # Latest draft from the assistant, kept out of messages
+    history_summary = Column(Text, nullable=True)  # Summary of messages before summarized_until
+    summarized_until = Column(Integer, nullable=True)  # Index of the first message not in history_summary
     current_step = Column(String(50), nullable=True)  # e.g., "personality", "tone", "tools"
     is_completed = Column(Integer, nullable=False, default=0)
     
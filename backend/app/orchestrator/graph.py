@@ -399,10 +399,7 @@ def process_campaign_lead_with_graph(campaign_lead_id: int, db: Session):
             db.add(processing_log)
         db.commit()
         
-        # Update campaign statistics
-        campaign = campaign_lead.campaign
-        campaign.update_stats()
-        db.commit()
+        # Campaign stats are checkpointed by the caller (see campaign_tasks.process_single_lead)
         
         logger.info(f"LangGraph processing complete for CampaignLead {campaign_lead_id}: {final_state['status']}")
         
@@ -427,11 +424,6 @@ def process_campaign_lead_with_graph(campaign_lead_id: int, db: Session):
                 campaign_lead.error_message = str(e)
                 campaign_lead.processed_at = datetime.now()
                 db.commit()
-                
-                # Update campaign statistics
-                campaign = campaign_lead.campaign
-                campaign.update_stats()
-                db.commit()
         except Exception as update_error:
             logger.error(f"Error updating CampaignLead after failure: {str(update_error)}")
         
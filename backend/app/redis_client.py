@@ -0,0 +1,29 @@
+"""Redis connection configuration."""
+import socket
+from redis import BlockingConnectionPool, Redis
+from app.config import settings
+
+# Keepalive probes stop idle connections from being silently dropped by a NAT/LB;
+# the TCP_KEEP* options are Linux-specific, so only the ones available are set
+_KEEPALIVE_OPTIONS = {
+    getattr(socket, name): value
+    for name, value in (('TCP_KEEPIDLE', 60), ('TCP_KEEPINTVL', 30), ('TCP_KEEPCNT', 3))
+    if hasattr(socket, name)
+}
+
+
+def create_redis_connection() -> Redis:
+    """Create a Redis client over a bounded pool that health-checks idle connections.
+
+    redis-py resets the pool in a forked child, so each RQ work horse gets its
+    own pool with the same bounds.
+    """
+    pool = BlockingConnectionPool.from_url(
+        settings.REDIS_URL,
+        max_connections=50,
+        timeout=20,
+        socket_keepalive=True,
+        socket_keepalive_options=_KEEPALIVE_OPTIONS,
+        health_check_interval=30
+    )
+    return Redis(connection_pool=pool)
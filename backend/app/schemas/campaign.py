@@ -1,11 +1,9 @@
 """Campaign schemas."""
 from pydantic import BaseModel, ConfigDict
-from typing import Optional, Dict, Any, List, TYPE_CHECKING
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from app.models.campaign import CampaignStatus, AgentType
-
-if TYPE_CHECKING:
-    from app.schemas.campaign_lead import CampaignLeadResponse
+from app.schemas.campaign_lead import CampaignLeadResponse
 
 
 class CampaignBase(BaseModel):
@@ -64,7 +62,7 @@ class CampaignResponse(CampaignBase):
 
 class CampaignWithLeads(CampaignResponse):
     """Schema for campaign response with leads."""
-    campaign_leads: List[Dict[str, Any]] = []  # Simplified to avoid circular import
+    campaign_leads: List[CampaignLeadResponse] = []
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -12,6 +12,7 @@ class ChatSessionCreate(BaseModel):
 class ChatSessionResponse(BaseModel):
     id: int
     messages: List[ChatMessage]
+    draft_prompt: Optional[str] = None
     is_completed: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
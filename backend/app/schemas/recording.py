@@ -1,10 +1,51 @@
 """Pydantic schemas for recording/prompt builder feature."""
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
+from typing_extensions import TypedDict
 from datetime import datetime
 from app.models.recording import RecordingStatus
 
 
+# Analysis payload shapes for newly written analyses (closed structures validate
+# faster than Dict[str, Any]). Responses keep Dict[str, Any], since stored rows
+# include free-form JSON written before the analysis output had a fixed schema.
+class CommunicationStyle(TypedDict, total=False):
+    """Communication style extracted from a call."""
+    formality: str
+    energy: str
+    pace: str
+
+
+class RecommendedSettings(TypedDict, total=False):
+    """Recommended ElevenLabs voice settings."""
+    stability: float
+    similarity_boost: float
+    style: float
+    use_speaker_boost: bool
+
+
+class VoiceProfile(TypedDict, total=False):
+    """Voice characteristics derived from transcript timing."""
+    speaking_rate_wpm: float
+    pace: str
+    recommended_settings: RecommendedSettings
+
+
+class ConversationFlow(TypedDict, total=False):
+    """Summary of each conversation stage."""
+    opening: str
+    discovery: str
+    presentation: str
+    closing: str
+
+
+class SuccessPatterns(TypedDict, total=False):
+    """Patterns that made the call successful."""
+    strengths: List[str]
+    unique_approaches: List[str]
+    rapport_building: str
+
+
 # Recording Schemas
 class RecordingBase(BaseModel):
     """Base recording schema."""
@@ -75,6 +116,10 @@ class AnalysisBase(BaseModel):
 class AnalysisCreate(AnalysisBase):
     """Schema for creating an analysis."""
     recording_id: int
+    communication_style: Optional[CommunicationStyle] = None
+    conversation_flow: Optional[ConversationFlow] = None
+    success_patterns: Optional[SuccessPatterns] = None
+    voice_profile: Optional[VoiceProfile] = None
 
 
 class AnalysisResponse(AnalysisBase):
@@ -1,18 +1,83 @@
 """Analysis service for extracting insights from transcripts."""
-import os
+import asyncio
 import logging
-from typing import Dict, Any, List
-from openai import AsyncOpenAI
+from typing import Dict, Any, List, Optional
+from pydantic import BaseModel, ConfigDict, ValidationError
 import json
+from app.services.elevenlabs import ElevenLabsService, get_elevenlabs_service
+from app.services.openai_client import get_openai_client
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of per-call OpenAI requests in flight during best-practice extraction
+MAX_CONCURRENT_REFINEMENTS = 10
+
+
+# Structured output schema for transcript analysis (strict mode requires closed objects)
+class _StrictModel(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+
+class _CommunicationStyle(_StrictModel):
+    formality: str
+    energy: str
+    pace: str
+
+
+class _Hook(_StrictModel):
+    text: str
+    effectiveness: str
+    context: str
+
+
+class _Objection(_StrictModel):
+    objection: str
+    response: str
+    outcome: str
+    technique: str
+
+
+class _ConversationFlow(_StrictModel):
+    opening: str
+    discovery: str
+    presentation: str
+    closing: str
+
+
+class _SuccessPatterns(_StrictModel):
+    strengths: List[str]
+    unique_approaches: List[str]
+    rapport_building: str
+
+
+class SalesAnalysis(_StrictModel):
+    """LLM response shape for a single sales call analysis."""
+    tonality_description: str
+    communication_style: _CommunicationStyle
+    hooks: List[_Hook]
+    objections: List[_Objection]
+    key_phrases: List[str]
+    conversation_flow: _ConversationFlow
+    success_patterns: _SuccessPatterns
+
+
+# Built once so each request skips JSON schema generation
+_ANALYSIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "sales_analysis",
+        "schema": SalesAnalysis.model_json_schema(),
+        "strict": True
+    }
+}
+
 
 class AnalysisService:
     """Service for analyzing call transcripts to extract insights."""
     
-    def __init__(self):
-        self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, elevenlabs: Optional[ElevenLabsService] = None):
+        self.client = get_openai_client()
+        self.elevenlabs = elevenlabs or get_elevenlabs_service()
     
     async def analyze_transcript(
         self,
@@ -90,20 +155,20 @@ Provide only the JSON response, no additional text."""
                 ],
                 temperature=0.3,
                 max_tokens=2000,
-                response_format={"type": "json_object"}
+                response_format=_ANALYSIS_RESPONSE_FORMAT
             )
             
-            # Parse the JSON response
-            analysis_result = json.loads(response.choices[0].message.content)
+            # Validate the structured response
+            analysis_result = SalesAnalysis.model_validate_json(
+                response.choices[0].message.content
+            ).model_dump()
             
             # Add voice profile analysis
-            from app.services.elevenlabs import ElevenLabsService
-            elevenlabs = ElevenLabsService()
-            voice_profile = await elevenlabs.analyze_voice_characteristics(segments)
+            voice_profile = await self.elevenlabs.analyze_voice_characteristics(segments)
             analysis_result["voice_profile"] = voice_profile
             
             # Recommend voice
-            recommended_voice = elevenlabs.recommend_voice(
+            recommended_voice = self.elevenlabs.recommend_voice(
                 analysis_result.get("tonality_description", ""),
                 analysis_result.get("communication_style", {})
             )
@@ -111,7 +176,7 @@ Provide only the JSON response, no additional text."""
             
             return analysis_result
             
-        except json.JSONDecodeError as e:
+        except ValidationError as e:
             logger.error(f"Error parsing analysis JSON: {str(e)}")
             # Return a basic structure if parsing fails
             return self._get_fallback_analysis()
@@ -155,15 +220,51 @@ Provide only the JSON response, no additional text."""
             "recommended_voice_id": "EXAVITQu4vr4xnSDxMaL"
         }
     
+    async def _refine_analysis(
+        self,
+        analysis: Dict[str, Any],
+        semaphore: asyncio.Semaphore
+    ) -> Dict[str, Any]:
+        """Condense a single analysis down to its most effective hooks, objections and phrases."""
+        refine_prompt = f"""From this sales call analysis, keep only the most effective hooks, objection handling and key phrases.
+
+Analysis:
+{json.dumps({k: analysis.get(k, []) for k in ("hooks", "objections", "key_phrases")}, indent=2)}
+
+Provide a JSON response with the same "hooks", "objections" and "key_phrases" structure."""
+
+        async with semaphore:
+            response = await self.client.chat.completions.create(
+                model="gpt-4o",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are an expert sales coach and conversation analyst."
+                    },
+                    {
+                        "role": "user",
+                        "content": refine_prompt
+                    }
+                ],
+                temperature=0.3,
+                max_tokens=1000,
+                response_format={"type": "json_object"}
+            )
+        
+        return json.loads(response.choices[0].message.content)
+    
     async def extract_best_practices(
         self,
-        multiple_analyses: List[Dict[str, Any]]
+        multiple_analyses: List[Dict[str, Any]],
+        refine_each: bool = False
     ) -> Dict[str, Any]:
         """
         Extract common best practices from multiple call analyses.
         
         Args:
             multiple_analyses: List of analysis results from different calls
+            refine_each: Condense each analysis with its own LLM call before synthesis.
+                The per-call requests run concurrently, capped at MAX_CONCURRENT_REFINEMENTS.
             
         Returns:
             Consolidated best practices
@@ -172,6 +273,12 @@ Provide only the JSON response, no additional text."""
             return {}
         
         try:
+            if refine_each:
+                semaphore = asyncio.Semaphore(MAX_CONCURRENT_REFINEMENTS)
+                multiple_analyses = await asyncio.gather(
+                    *(self._refine_analysis(a, semaphore) for a in multiple_analyses)
+                )
+            
             # Combine all analyses
             combined = {
                 "all_hooks": [],
@@ -2,11 +2,22 @@
 import os
 import httpx
 import logging
+from bisect import bisect_right
+from functools import lru_cache
 from typing import Dict, Any, Optional, List
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Speaking-rate boundaries (WPM) and the (pace, stability, similarity_boost)
+# settings for each band: < 120 slow, < 160 moderate, otherwise fast.
+_PACE_EDGES = (120.0, 160.0)
+_PACE_TABLE = (
+    ("slow", 0.7, 0.3),
+    ("moderate", 0.5, 0.5),
+    ("fast", 0.3, 0.7),
+)
+
 
 class ElevenLabsService:
     """Service for interacting with ElevenLabs API."""
@@ -20,6 +31,19 @@ class ElevenLabsService:
         self.headers = {
             "xi-api-key": self.api_key,
         }
+        
+        # Shared HTTP/2 client so concurrent TTS requests multiplex over one connection
+        self.http = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=30.0,
+            http2=True,
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100)
+        )
+    
+    async def aclose(self):
+        """Close the underlying HTTP client."""
+        await self.http.aclose()
     
     async def transcribe_audio(self, file_path: str) -> Dict[str, Any]:
         """
@@ -36,9 +60,9 @@ class ElevenLabsService:
             # We'll use their speech-to-text if available, or fall back to OpenAI Whisper
             # For now, implementing with OpenAI Whisper as fallback
             
-            from openai import AsyncOpenAI
+            from app.services.openai_client import get_openai_client
             
-            client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            client = get_openai_client()
             
             with open(file_path, "rb") as audio_file:
                 transcript = await client.audio.transcriptions.create(
@@ -48,16 +72,17 @@ class ElevenLabsService:
                     timestamp_granularities=["segment"]
                 )
             
-            # Convert to our format
-            segments = []
-            if hasattr(transcript, 'segments') and transcript.segments:
-                for seg in transcript.segments:
-                    segments.append({
-                        "text": seg.get("text", ""),
-                        "start": seg.get("start", 0.0),
-                        "end": seg.get("end", 0.0),
-                        "speaker": "unknown"  # Whisper doesn't do speaker diarization
-                    })
+            # Project Whisper segments onto our format in a single pass
+            # (Whisper doesn't do speaker diarization)
+            segments = [
+                {
+                    "text": seg.get("text", ""),
+                    "start": seg.get("start", 0.0),
+                    "end": seg.get("end", 0.0),
+                    "speaker": "unknown"
+                }
+                for seg in getattr(transcript, 'segments', None) or ()
+            ]
             
             return {
                 "full_text": transcript.text,
@@ -78,15 +103,10 @@ class ElevenLabsService:
             List of voice configurations
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/voices",
-                    headers=self.headers,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                return data.get("voices", [])
+            response = await self.http.get("/voices")
+            response.raise_for_status()
+            data = response.json()
+            return data.get("voices", [])
         except Exception as e:
             logger.error(f"Error fetching voices: {str(e)}")
             return []
@@ -118,18 +138,7 @@ class ElevenLabsService:
         wpm = (total_words / total_duration * 60) if total_duration > 0 else 0
         
         # Determine pace
-        if wpm < 120:
-            pace = "slow"
-            stability = 0.7
-            similarity_boost = 0.3
-        elif wpm < 160:
-            pace = "moderate"
-            stability = 0.5
-            similarity_boost = 0.5
-        else:
-            pace = "fast"
-            stability = 0.3
-            similarity_boost = 0.7
+        pace, stability, similarity_boost = _PACE_TABLE[bisect_right(_PACE_EDGES, wpm)]
         
         return {
             "speaking_rate_wpm": round(wpm, 1),
@@ -197,22 +206,29 @@ class ElevenLabsService:
             Audio bytes
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/text-to-speech/{voice_id}",
-                    headers={
-                        **self.headers,
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "text": text,
-                        "model_id": "eleven_monolingual_v1",
-                        "voice_settings": voice_settings
-                    },
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                return response.content
+            response = await self.http.post(
+                f"/text-to-speech/{voice_id}",
+                json={
+                    "text": text,
+                    "model_id": "eleven_monolingual_v1",
+                    "voice_settings": voice_settings
+                }
+            )
+            response.raise_for_status()
+            return response.content
         except Exception as e:
             logger.error(f"Error generating speech: {str(e)}")
             raise
+
+
+@lru_cache(maxsize=1)
+def get_elevenlabs_service() -> ElevenLabsService:
+    """Return the process-wide ElevenLabsService instance."""
+    return ElevenLabsService()
+
+
+async def close_elevenlabs_service():
+    """Close the shared ElevenLabsService client if one was created."""
+    if get_elevenlabs_service.cache_info().currsize:
+        await get_elevenlabs_service().aclose()
+        get_elevenlabs_service.cache_clear()
@@ -0,0 +1,45 @@
+"""Shared OpenAI clients.
+
+The clients are reused for the life of a process, which pays off in the API
+process. RQ forks a new work horse per job, so campaign and recording jobs
+each build (and drop) their own client.
+"""
+from functools import lru_cache
+from openai import AsyncOpenAI, OpenAI
+from app.config import settings
+
+# Make LangSmith tracing optional
+try:
+    from langsmith.wrappers import wrap_openai
+    LANGSMITH_AVAILABLE = True
+except ImportError:
+    LANGSMITH_AVAILABLE = False
+
+
+def _traced(client):
+    """Wrap a client so its completions are recorded as LangSmith LLM runs when tracing is on."""
+    if LANGSMITH_AVAILABLE and settings.LANGCHAIN_TRACING_V2 and settings.LANGCHAIN_API_KEY:
+        return wrap_openai(client)
+    return client
+
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> AsyncOpenAI:
+    """Return the process-wide AsyncOpenAI client so its connection pool is reused."""
+    return _traced(AsyncOpenAI(api_key=settings.OPENAI_API_KEY))
+
+
+@lru_cache(maxsize=1)
+def get_sync_openai_client() -> OpenAI:
+    """Return the process-wide OpenAI client for synchronous callers (graph nodes, workers)."""
+    return _traced(OpenAI(api_key=settings.OPENAI_API_KEY))
+
+
+async def close_openai_client():
+    """Close the shared OpenAI clients if they were created."""
+    if get_openai_client.cache_info().currsize:
+        await get_openai_client().close()
+        get_openai_client.cache_clear()
+    if get_sync_openai_client.cache_info().currsize:
+        get_sync_openai_client().close()
+        get_sync_openai_client.cache_clear()
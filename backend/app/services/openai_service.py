@@ -1,9 +1,15 @@
-"""OpenAI service for SMS agent using LangChain."""
+"""OpenAI service for SMS agent."""
+import asyncio
+import hashlib
+import json
 import logging
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
+import random
+import re
+from typing import Dict, Any, List, Optional
+from openai.types.chat import ChatCompletion
 from app.config import settings
+from app.services.openai_client import get_openai_client, get_sync_openai_client
+from app.services.shared_cache import cache_get, cache_set
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +25,176 @@ except ImportError:
         return decorator
 
 
+# (input, output) USD cost per token. Order matters for substring matching:
+# "gpt-4o-mini" must be checked before "gpt-4o".
+_MODEL_PRICING = {
+    "gpt-4o-mini": (0.15 / 1_000_000, 0.60 / 1_000_000),
+    "gpt-4o": (2.50 / 1_000_000, 10.00 / 1_000_000),
+}
+_DEFAULT_PRICING = _MODEL_PRICING["gpt-4o-mini"]
+
+
+def _calculate_cost(model: str, token_usage: Dict[str, Any]) -> float:
+    """Calculate the USD cost of a completion from its token usage."""
+    if not token_usage:
+        return 0.0
+    prices = _MODEL_PRICING.get(model) or next(
+        (v for k, v in _MODEL_PRICING.items() if k in model),
+        _DEFAULT_PRICING
+    )
+    return (
+        token_usage.get('prompt_tokens', 0) * prices[0]
+        + token_usage.get('completion_tokens', 0) * prices[1]
+    )
+
+
+# Fixed SMS instructions are appended to the system prompt so the whole system
+# message is a byte-stable prefix for OpenAI prompt caching; only the lead
+# details vary in the human message.
+_SMS_INSTRUCTIONS = """Generate a professional SMS message for the lead described in the user's message.
+Keep the message under 160 characters, friendly, and professional.
+Only return the SMS text, nothing else."""
+
+SMS_MODEL = "gpt-4o-mini"
+
+# Batch API requests are billed at half the synchronous price
+_BATCH_COST_MULTIPLIER = 0.5
+_BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+_SMS_HUMAN_TEMPLATE = """Name: {name}
+Phone: {phone}
+Email: {email}
+Company: {company}"""
+
+# Exact-match cache of generated SMS keyed on (system_prompt, lead_data, temperature).
+# Stored in Redis so it is shared by the per-lead RQ jobs.
+_SMS_CACHE_MAX_TEMPERATURE = 0.3
+_SMS_CACHE_TTL = 3600
+
+
+def _sms_cache_key(system_prompt: str, lead_data: Dict[str, Any], temperature: float) -> str:
+    """Hash the canonical JSON form of the SMS generation inputs."""
+    payload = json.dumps(
+        {"sp": system_prompt, "ld": lead_data, "t": temperature},
+        sort_keys=True,
+        default=str
+    )
+    return "sms:cache:" + hashlib.blake2b(payload.encode()).hexdigest()
+
+
+# Response-template cache keyed on the system prompt: a generated SMS is stored
+# with the lead's values replaced by placeholders and re-filled for later leads.
+# A fraction of hits still go to the LLM so templates get refreshed.
+_TEMPLATE_FIELDS = ("name", "first_name", "company")
+# Lead details that are never templated; a template still containing one is discarded
+_NON_TEMPLATE_FIELDS = ("email", "phone")
+_TEMPLATE_REFRESH_RATE = 0.1
+_SMS_TEMPLATE_TTL = 24 * 3600
+
+
+def _template_values(lead_data: Dict[str, Any]) -> Dict[str, str]:
+    """Collect the non-empty lead values that may appear verbatim in an SMS."""
+    values = {
+        "name": lead_data.get("name"),
+        "company": lead_data.get("company"),
+    }
+    if isinstance(values["name"], str) and values["name"].strip():
+        values["first_name"] = values["name"].split()[0]
+    return {k: v for k, v in values.items() if isinstance(v, str) and v.strip()}
+
+
+def _word_pattern(value: str, flags: int = 0) -> "re.Pattern[str]":
+    """Match value as a whole word, so "Al" doesn't match inside "Also"."""
+    return re.compile(r"(?<!\w)" + re.escape(value) + r"(?!\w)", flags)
+
+
+def _make_sms_template(sms_message: str, lead_data: Dict[str, Any]) -> Optional[str]:
+    """Turn a generated SMS into a template, or None if it isn't personalized
+    or still contains details of this lead."""
+    template = sms_message
+    # Longest values first so "John Smith" is replaced before "John"
+    values = _template_values(lead_data)
+    for field in sorted(values, key=lambda f: len(values[f]), reverse=True):
+        template = _word_pattern(values[field]).sub("{" + field + "}", template)
+    if template == sms_message:
+        return None
+    
+    # Reject templates that would leak this lead's details to other leads, e.g. a
+    # last name, a differently cased company, or the lead's email or phone
+    leftovers = [*values.values(), *values.get("name", "").split()]
+    leftovers += [lead_data.get(field) for field in _NON_TEMPLATE_FIELDS]
+    for value in leftovers:
+        if isinstance(value, str) and value.strip() and _word_pattern(value.strip(), re.IGNORECASE).search(template):
+            return None
+    return template
+
+
+def _fill_sms_template(template: str, lead_data: Dict[str, Any]) -> Optional[str]:
+    """Fill a cached template for a new lead, or None if a placeholder can't be filled."""
+    values = _template_values(lead_data)
+    message = template
+    for field in _TEMPLATE_FIELDS:
+        placeholder = "{" + field + "}"
+        if placeholder in message:
+            if field not in values:
+                return None
+            message = message.replace(placeholder, values[field])
+    return message
+
+
+def _sms_messages(system_prompt: str, lead_data: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Build the chat messages for an SMS generation request."""
+    return [
+        {'role': 'system', 'content': f"{system_prompt}\n\n{_SMS_INSTRUCTIONS}"},
+        {'role': 'user', 'content': _SMS_HUMAN_TEMPLATE.format(**lead_data)}
+    ]
+
+
+_AGENT_CONTEXT_TMPL = """Name: {name}
+Phone: {phone}
+Email: {email}
+Company: {company}{enrichment}"""
+_ENRICHMENT_LABELS = (
+    ('industry', 'Industry'),
+    ('size', 'Company Size'),
+    ('location', 'Location'),
+)
+
+
+class _ContextValues(dict):
+    """format_map mapping that renders missing context keys as 'Unknown'."""
+    
+    def __missing__(self, key: str) -> str:
+        return 'Unknown'
+
+
+def _build_agent_context(context: Dict[str, Any]) -> str:
+    """Render lead context (and enrichment data, if any) for the agent's user message."""
+    enrichment = [
+        f"\n{label}: {context[key]}"
+        for key, label in _ENRICHMENT_LABELS
+        if context.get(key)
+    ]
+    return _AGENT_CONTEXT_TMPL.format_map(_ContextValues(
+        context,
+        enrichment="\n\nEnriched Data:" + "".join(enrichment) if enrichment else ""
+    ))
+
+
+def _token_usage(response) -> Dict[str, int]:
+    """Extract token usage from a chat completion as a plain dict."""
+    usage = response.usage
+    if usage is None:
+        return {}
+    return {
+        'prompt_tokens': usage.prompt_tokens,
+        'completion_tokens': usage.completion_tokens,
+        'total_tokens': usage.total_tokens
+    }
+
+
 class OpenAIService:
-    """Service for interacting with OpenAI via LangChain."""
+    """Service for interacting with OpenAI."""
     
     def __init__(self):
         self.api_key = settings.OPENAI_API_KEY
@@ -32,7 +206,9 @@ class OpenAIService:
         self, 
         system_prompt: str, 
         lead_data: Dict[str, Any],
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        cacheable: Optional[bool] = None,
+        use_template_cache: bool = False
     ) -> Dict[str, Any]:
         """
         Generate a personalized SMS message using OpenAI.
@@ -41,67 +217,60 @@ class OpenAIService:
             system_prompt: The agent's system prompt
             lead_data: Lead information (name, phone, etc.)
             temperature: LLM temperature (0.0-1.0)
+            cacheable: Reuse an identical earlier response. Defaults to True
+                only for low temperatures (<= 0.3).
+            use_template_cache: Reuse an earlier SMS for the same system prompt by
+                substituting this lead's name/company instead of calling the LLM.
         
         Returns:
             Dict with 'success', 'message', 'cost', and optional 'error'
         """
+        if cacheable is None:
+            cacheable = temperature <= _SMS_CACHE_MAX_TEMPERATURE
+        
+        cache_key = None
+        if cacheable:
+            cache_key = _sms_cache_key(system_prompt, lead_data, temperature)
+            cached = cache_get(cache_key)
+            if cached is not None:
+                logger.info("SMS cache hit")
+                return {**cached, 'cost': 0.0, 'cache_hit': True}
+        
+        template_key = None
+        if use_template_cache:
+            template_key = "sms:template:" + hashlib.blake2b(
+                json.dumps([system_prompt, temperature]).encode()
+            ).hexdigest()
+            template = cache_get(template_key)
+            if template is not None and random.random() >= _TEMPLATE_REFRESH_RATE:
+                sms_message = _fill_sms_template(template, lead_data)
+                if sms_message is not None:
+                    logger.info("SMS template cache hit")
+                    return {
+                        'success': True,
+                        'message': sms_message,
+                        'tokens_used': {},
+                        'cost': 0.0,
+                        'cache_hit': True
+                    }
+        
         try:
-            # Initialize LangChain ChatOpenAI
-            llm = ChatOpenAI(
-                model="gpt-4o-mini",
+            response = get_sync_openai_client().chat.completions.create(
+                model=SMS_MODEL,
                 temperature=temperature,
-                api_key=self.api_key
+                messages=_sms_messages(system_prompt, lead_data)
             )
+            result = self._parse_sms_response(response)
             
-            # Create prompt template
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", system_prompt),
-                ("human", """Generate a professional SMS message for this lead:
-
-Name: {name}
-Phone: {phone}
-Email: {email}
-Company: {company}
-
-Keep the message under 160 characters, friendly, and professional.
-Only return the SMS text, nothing else.""")
-            ])
-            
-            # Format the prompt with lead data
-            messages = prompt.format_messages(**lead_data)
-            
-            # Generate the message
-            response = llm.invoke(messages)
-            sms_message = response.content.strip()
+            if cache_key is not None:
+                cache_set(cache_key, result, _SMS_CACHE_TTL)
             
-            # Extract token usage
-            token_usage = response.response_metadata.get('token_usage', {})
-            if not token_usage and hasattr(response, 'usage_metadata'):
-                usage = response.usage_metadata
-                token_usage = {
-                    'prompt_tokens': usage.get('input_tokens', 0),
-                    'completion_tokens': usage.get('output_tokens', 0),
-                    'total_tokens': usage.get('total_tokens', 0)
-                }
-            
-            # Calculate cost (GPT-4o-mini: $0.15/$0.60 per 1M tokens)
-            cost = 0.0
-            if token_usage:
-                input_tokens = token_usage.get('prompt_tokens', 0)
-                output_tokens = token_usage.get('completion_tokens', 0)
-                input_cost = (input_tokens / 1_000_000) * 0.15
-                output_cost = (output_tokens / 1_000_000) * 0.60
-                cost = input_cost + output_cost
+            if template_key is not None:
+                template = _make_sms_template(result['message'], lead_data)
+                if template is not None:
+                    cache_set(template_key, template, _SMS_TEMPLATE_TTL)
             
-            logger.info(f"Generated SMS: {sms_message[:50]}...")
-            logger.info(f"Token usage: {token_usage}, Cost: ${cost:.6f}")
-            
-            return {
-                'success': True,
-                'message': sms_message,
-                'tokens_used': token_usage,
-                'cost': cost
-            }
+            return result
             
         except Exception as e:
             logger.error(f"Error generating SMS message: {str(e)}")
@@ -112,6 +281,176 @@ Only return the SMS text, nothing else.""")
                 'cost': 0.0
             }
     
+    @traceable(name="generate_sms_messages_batch")
+    async def generate_sms_messages_batch(
+        self,
+        list_of_lead_data: List[Dict[str, Any]],
+        system_prompt: str,
+        temperature: float = 0.7,
+        concurrency: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate SMS messages for many leads concurrently.
+        
+        Args:
+            list_of_lead_data: Lead information for each message
+            system_prompt: The agent's system prompt
+            temperature: LLM temperature (0.0-1.0)
+            concurrency: Maximum number of in-flight OpenAI requests
+        
+        Returns:
+            One result dict per lead, in input order, shaped like generate_sms_message
+        """
+        client = get_openai_client()
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _generate_one(lead_data: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                response = await client.chat.completions.create(
+                    model=SMS_MODEL,
+                    temperature=temperature,
+                    messages=_sms_messages(system_prompt, lead_data)
+                )
+            return self._parse_sms_response(response)
+        
+        results = await asyncio.gather(
+            *(_generate_one(lead_data) for lead_data in list_of_lead_data),
+            return_exceptions=True
+        )
+        
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Error generating SMS message: {str(result)}")
+                results[i] = {
+                    'success': False,
+                    'message': '',
+                    'error': str(result),
+                    'cost': 0.0
+                }
+        
+        return results
+    
+    async def submit_sms_batch(
+        self,
+        list_of_lead_data: List[Dict[str, Any]],
+        system_prompt: str,
+        temperature: float = 0.7
+    ) -> str:
+        """
+        Submit SMS generation for many leads to the OpenAI Batch API.
+        
+        Batches complete within 24 hours at half the normal cost, so this is
+        meant for workloads that can tolerate minutes-to-hours of latency.
+        
+        Args:
+            list_of_lead_data: Lead information for each message. A lead's 'id'
+                is used as its custom_id, falling back to its list index.
+            system_prompt: The agent's system prompt
+            temperature: LLM temperature (0.0-1.0)
+        
+        Returns:
+            The batch ID, to pass to await_batch
+        """
+        client = get_openai_client()
+        
+        lines = [
+            json.dumps({
+                'custom_id': str(lead_data.get('id', i)),
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': {
+                    'model': SMS_MODEL,
+                    'temperature': temperature,
+                    'messages': _sms_messages(system_prompt, lead_data)
+                }
+            })
+            for i, lead_data in enumerate(list_of_lead_data)
+        ]
+        batch_file = await client.files.create(
+            file=("sms_batch.jsonl", "\n".join(lines).encode()),
+            purpose="batch"
+        )
+        batch = await client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        
+        logger.info(f"Submitted SMS batch {batch.id} with {len(lines)} requests")
+        return batch.id
+    
+    async def await_batch(
+        self,
+        batch_id: str,
+        poll_interval: float = 5.0,
+        max_poll_interval: float = 300.0
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Wait for an SMS batch to finish and collect its results.
+        
+        Args:
+            batch_id: ID returned by submit_sms_batch
+            poll_interval: Initial delay between status checks, in seconds
+            max_poll_interval: Upper bound for the exponential backoff
+        
+        Returns:
+            Dict mapping custom_id to a result dict shaped like generate_sms_message
+        """
+        client = get_openai_client()
+        
+        while True:
+            batch = await client.batches.retrieve(batch_id)
+            if batch.status in _BATCH_TERMINAL_STATUSES:
+                break
+            await asyncio.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, max_poll_interval)
+        
+        logger.info(f"SMS batch {batch_id} finished with status {batch.status}")
+        
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await client.files.content(file_id)
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get('response') or {}
+                if response.get('status_code') == 200:
+                    result = self._parse_sms_response(ChatCompletion.model_validate(response['body']))
+                    result['cost'] *= _BATCH_COST_MULTIPLIER
+                else:
+                    error = item.get('error') or response.get('body', {}).get('error') or {}
+                    result = {
+                        'success': False,
+                        'message': '',
+                        'error': error.get('message', 'Batch request failed'),
+                        'cost': 0.0
+                    }
+                results[item['custom_id']] = result
+        
+        return results
+    
+    @staticmethod
+    def _parse_sms_response(response) -> Dict[str, Any]:
+        """Build the SMS result dict (message, token usage, cost) from a chat completion."""
+        sms_message = (response.choices[0].message.content or '').strip()
+        token_usage = _token_usage(response)
+        
+        # Calculate cost (GPT-4o-mini: $0.15/$0.60 per 1M tokens)
+        cost = _calculate_cost(SMS_MODEL, token_usage)
+        
+        logger.info(f"Generated SMS: {sms_message[:50]}...")
+        logger.info(f"Token usage: {token_usage}, Cost: ${cost:.6f}")
+        
+        return {
+            'success': True,
+            'message': sms_message,
+            'tokens_used': token_usage,
+            'cost': cost
+        }
+    
     @traceable(name="generate_message_with_agent")
     def generate_message_with_agent(
         self,
@@ -138,83 +477,34 @@ Only return the SMS text, nothing else.""")
             Dict with 'success', 'message', 'cost', and optional 'error'
         """
         try:
-            # Initialize LangChain ChatOpenAI with specified model
-            llm = ChatOpenAI(
-                model=model,
-                temperature=temperature,
-                api_key=self.api_key
-            )
-            
             # Build messages list
-            messages = [("system", system_prompt)]
+            messages = [{'role': 'system', 'content': f"{system_prompt}\n\n{_SMS_INSTRUCTIONS}"}]
             
             # Add conversation history if provided
             if conversation_history:
                 for msg in conversation_history:
                     role = msg.get('role', 'assistant')
-                    content = msg.get('content', '')
                     if role == 'system':
                         continue  # Skip system messages from history
-                    messages.append((role, content))
+                    messages.append({
+                        'role': 'user' if role in ('user', 'human') else 'assistant',
+                        'content': msg.get('content', '')
+                    })
             
             # Add current context as human message
-            context_str = f"""Generate a professional SMS message for this lead:
-
-Name: {context.get('name', 'Unknown')}
-Phone: {context.get('phone', 'Unknown')}
-Email: {context.get('email', 'Unknown')}
-Company: {context.get('company', 'Unknown')}"""
-            
-            # Add enrichment data if available
-            if context.get('industry') or context.get('size') or context.get('location'):
-                context_str += "\n\nEnriched Data:"
-                if context.get('industry'):
-                    context_str += f"\nIndustry: {context['industry']}"
-                if context.get('size'):
-                    context_str += f"\nCompany Size: {context['size']}"
-                if context.get('location'):
-                    context_str += f"\nLocation: {context['location']}"
-            
-            context_str += "\n\nKeep the message under 160 characters, friendly, and professional.\nOnly return the SMS text, nothing else."
-            
-            messages.append(("human", context_str))
+            messages.append({'role': 'user', 'content': _build_agent_context(context)})
             
-            # Create prompt and generate
-            prompt = ChatPromptTemplate.from_messages(messages)
-            formatted_messages = prompt.format_messages()
-            
-            response = llm.invoke(formatted_messages)
-            message = response.content.strip()
-            
-            # Extract token usage
-            token_usage = response.response_metadata.get('token_usage', {})
-            if not token_usage and hasattr(response, 'usage_metadata'):
-                usage = response.usage_metadata
-                token_usage = {
-                    'prompt_tokens': usage.get('input_tokens', 0),
-                    'completion_tokens': usage.get('output_tokens', 0),
-                    'total_tokens': usage.get('total_tokens', 0)
-                }
+            # Generate
+            response = get_sync_openai_client().chat.completions.create(
+                model=model,
+                temperature=temperature,
+                messages=messages
+            )
+            message = (response.choices[0].message.content or '').strip()
+            token_usage = _token_usage(response)
             
-            # Calculate cost based on model
-            cost = 0.0
-            if token_usage:
-                input_tokens = token_usage.get('prompt_tokens', 0)
-                output_tokens = token_usage.get('completion_tokens', 0)
-                
-                # Pricing varies by model
-                if 'gpt-4o-mini' in model:
-                    input_cost = (input_tokens / 1_000_000) * 0.15
-                    output_cost = (output_tokens / 1_000_000) * 0.60
-                elif 'gpt-4o' in model:
-                    input_cost = (input_tokens / 1_000_000) * 2.50
-                    output_cost = (output_tokens / 1_000_000) * 10.00
-                else:
-                    # Default to gpt-4o-mini pricing
-                    input_cost = (input_tokens / 1_000_000) * 0.15
-                    output_cost = (output_tokens / 1_000_000) * 0.60
-                
-                cost = input_cost + output_cost
+            # Calculate cost based on model (defaults to gpt-4o-mini pricing)
+            cost = _calculate_cost(model, token_usage)
             
             logger.info(f"Agent {agent_id} generated message: {message[:50]}...")
             logger.info(f"Model: {model}, Token usage: {token_usage}, Cost: ${cost:.6f}")
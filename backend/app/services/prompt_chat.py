@@ -1,9 +1,24 @@
+import asyncio
 import json
+import logging
+import re
 from sqlalchemy.orm import Session
 from app.models.recording import PromptChatSession, GeneratedPrompt, PromptSourceType
-from app.config import settings
-import openai
-from typing import List, Dict, Any
+from app.services.openai_client import get_openai_client
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Characters per SSE frame when streaming a reply to the client
+STREAM_CHUNK_SIZE = 32
+
+# Conversation turns (user + assistant pairs) sent to the model verbatim. Once the
+# unsummarized history exceeds this, the older half is folded into a summary.
+MAX_HISTORY_TURNS = 20
+
+SUMMARY_PROMPT = """Summarize the prompt-building interview below for your own future reference.
+Keep every concrete decision the user made about the agent (role, audience, tone, goals, guardrails, tools, formatting) and any open questions.
+Be concise and use plain sentences."""
 
 SYSTEM_PROMPT = """You are an expert AI Prompt Engineer. Your goal is to interview the user to build a robust system prompt for an AI agent.
 
@@ -168,10 +183,102 @@ You have access to pricing calculators, installation scheduling tools, and finan
 6. **CRITICAL: Only include sections in draft_prompt that have been discussed. Do NOT add "(To be discussed)" placeholders. If a section hasn't been covered yet, simply omit it from the draft entirely.**
 """
 
+# Trailing escape that can't be decoded yet: a lone backslash, a partial \uXXXX,
+# or a high surrogate still waiting for its pair
+_INCOMPLETE_ESCAPE = re.compile(r'(?:\\u[dD][89abAB][0-9a-fA-F]{2})?(?:\\u[0-9a-fA-F]{0,3}|\\)?$')
+
+
+class _JsonFieldStreamer:
+    """Incrementally extract a top-level string field from a JSON object as it streams in."""
+
+    def __init__(self, field: str):
+        self.field = field
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.expect_key = False
+        self.key_buffer = None
+        self.last_key = None
+        self.capturing = False
+        self.captured = False
+        self.pending = ""
+
+    def feed(self, text: str) -> str:
+        """Consume the next piece of JSON and return any newly decoded field text."""
+        decoded = []
+        raw_start = 0
+        for i, ch in enumerate(text):
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.capturing:
+                        decoded.append(self._decode(self.pending + text[raw_start:i]))
+                        self.pending = ""
+                        self.capturing = False
+                        self.captured = True
+                    elif self.key_buffer is not None:
+                        self.last_key = self.key_buffer
+                        self.key_buffer = None
+                    continue
+                if self.key_buffer is not None:
+                    self.key_buffer += ch
+            elif ch in "{[":
+                self.depth += 1
+                self.expect_key = self.depth == 1 and ch == "{"
+            elif ch in "}]":
+                self.depth -= 1
+            elif self.depth == 1 and ch == ",":
+                self.expect_key = True
+            elif self.depth == 1 and ch == ":":
+                self.expect_key = False
+            elif ch == '"':
+                self.in_string = True
+                if self.depth == 1 and self.expect_key:
+                    self.key_buffer = ""
+                elif self.depth == 1 and self.last_key == self.field and not self.captured:
+                    self.capturing = True
+                    raw_start = i + 1
+        
+        if self.capturing:
+            # Decode everything except an escape sequence split across chunks
+            self.pending += text[raw_start:]
+            match = _INCOMPLETE_ESCAPE.search(self.pending)
+            cut = match.start() if match and self._is_escape(match.start()) else len(self.pending)
+            if cut:
+                decoded.append(self._decode(self.pending[:cut]))
+                self.pending = self.pending[cut:]
+        
+        return "".join(decoded)
+
+    def _decode(self, raw: str) -> str:
+        """Decode a piece of JSON string content, falling back to the raw text if it's malformed."""
+        try:
+            return json.loads(f'"{raw}"')
+        except json.JSONDecodeError as e:
+            logger.warning("Could not decode streamed %s field, emitting raw text: %s", self.field, e)
+            return raw
+
+    def _is_escape(self, index: int) -> bool:
+        """Whether the backslash at index starts an escape (isn't itself escaped)."""
+        backslashes = len(self.pending[:index]) - len(self.pending[:index].rstrip("\\"))
+        return backslashes % 2 == 0
+
+
 class PromptChatService:
+    """Interactive prompt-building chat.
+    
+    Expects a Session with expire_on_commit=False (see get_db_no_expire):
+    turns are committed in a worker thread and the session row is read again
+    on the event loop without being reloaded.
+    """
+
     def __init__(self, db: Session):
         self.db = db
-        self.client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = get_openai_client()
 
     async def create_session(self) -> PromptChatSession:
         """Start a new chat session."""
@@ -179,9 +286,6 @@ class PromptChatService:
             messages=[{"role": "system", "content": SYSTEM_PROMPT}],
             current_step="start"
         )
-        self.db.add(session)
-        self.db.commit()
-        self.db.refresh(session)
         
         # Generate initial greeting
         response = await self.client.chat.completions.create(
@@ -192,104 +296,106 @@ class PromptChatService:
         )
         
         greeting_content = response.choices[0].message.content
-        self._append_message(session, "assistant", greeting_content)
+        self._record_assistant_reply(session, greeting_content)
+        
+        self.db.add(session)
+        await asyncio.to_thread(self._commit, session)
         
         return session
 
     async def add_message(self, session_id: int, content: str) -> Dict[str, Any]:
         """Add user message and get AI response."""
-        session = self.db.query(PromptChatSession).filter(PromptChatSession.id == session_id).first()
+        session = await asyncio.to_thread(self.db.get, PromptChatSession, session_id)
         if not session:
             raise ValueError("Session not found")
             
         # Add user message
-        self._append_message(session, "user", content)
+        await asyncio.to_thread(self._append_user_message, session, content)
         
         # Get AI response
-        messages = [{"role": m["role"], "content": m["content"]} for m in session.messages]
-        
         response = await self.client.chat.completions.create(
             model="gpt-4o",
-            messages=messages,
+            messages=await self._prepare_messages(session),
             temperature=0.7,
             response_format={"type": "json_object"}
         )
         
         ai_response_content = response.choices[0].message.content
-        self._append_message(session, "assistant", ai_response_content)
+        ai_data = await asyncio.to_thread(self._finalize_assistant_message, session, ai_response_content)
         
-        # Parse JSON to return structured response
-        try:
-            ai_data = json.loads(ai_response_content)
-            return {
-                "role": "assistant",
-                "content": ai_data.get("message", ""),
-                "draft_prompt": ai_data.get("draft_prompt", "")
-            }
-        except json.JSONDecodeError:
+        # Return structured response
+        if ai_data is None:
             return {
                 "role": "assistant",
                 "content": ai_response_content
             }
+        return {
+            "role": "assistant",
+            "content": ai_data.get("message", ""),
+            "draft_prompt": ai_data.get("draft_prompt", "")
+        }
 
     async def add_message_stream(self, session_id: int, content: str):
         """Add user message and stream AI response."""
-        session = self.db.query(PromptChatSession).filter(PromptChatSession.id == session_id).first()
+        session = await asyncio.to_thread(self.db.get, PromptChatSession, session_id)
         if not session:
             raise ValueError("Session not found")
             
         # Add user message
-        self._append_message(session, "user", content)
+        await asyncio.to_thread(self._append_user_message, session, content)
         
         # Get AI response with streaming
-        messages = [{"role": m["role"], "content": m["content"]} for m in session.messages]
-        
         stream = await self.client.chat.completions.create(
             model="gpt-4o",
-            messages=messages,
+            messages=await self._prepare_messages(session),
             temperature=0.7,
             response_format={"type": "json_object"},
             stream=True
         )
         
-        # Buffer the complete JSON response first
+        # Forward the "message" field to the client as soon as it is generated,
+        # while buffering the complete JSON for draft_prompt and persistence
         full_response = ""
+        message_streamer = _JsonFieldStreamer("message")
+        streamed_any = False
         async for chunk in stream:
-            if chunk.choices[0].delta.content:
-                full_response += chunk.choices[0].delta.content
+            delta = chunk.choices[0].delta.content
+            if delta:
+                full_response += delta
+                text = message_streamer.feed(delta)
+                if text:
+                    streamed_any = True
+                    yield f"data: {json.dumps({'chunk': text})}\n\n"
         
         # Save complete response
-        self._append_message(session, "assistant", full_response)
+        ai_data = await asyncio.to_thread(self._finalize_assistant_message, session, full_response)
         
-        # Parse JSON and stream only the message content
-        try:
-            ai_data = json.loads(full_response)
+        if ai_data is not None:
             message_content = ai_data.get('message', '')
             draft_prompt = ai_data.get('draft_prompt', '')
             
-            # Stream the message content character by character
-            for char in message_content:
-                yield f"data: {json.dumps({'chunk': char})}\n\n"
-            
             # Send final data with draft prompt
             yield f"data: {json.dumps({'done': True, 'message': message_content, 'draft_prompt': draft_prompt})}\n\n"
-        except json.JSONDecodeError:
+        else:
             # Fallback: stream the raw response
-            for char in full_response:
-                yield f"data: {json.dumps({'chunk': char})}\n\n"
+            if not streamed_any:
+                for i in range(0, len(full_response), STREAM_CHUNK_SIZE):
+                    yield f"data: {json.dumps({'chunk': full_response[i:i + STREAM_CHUNK_SIZE]})}\n\n"
             yield f"data: {json.dumps({'done': True, 'message': full_response, 'draft_prompt': ''})}\n\n"
 
 
     async def generate_final_prompt(self, session_id: int) -> GeneratedPrompt:
         """Generate the final system prompt from the conversation."""
-        session = self.db.query(PromptChatSession).filter(PromptChatSession.id == session_id).first()
+        session = await asyncio.to_thread(self.db.get, PromptChatSession, session_id)
         if not session:
             raise ValueError("Session not found")
             
         # Create generation prompt
-        messages = [{"role": m["role"], "content": m["content"]} for m in session.messages]
+        # Shallow copy: the instruction below must not be persisted to the session
+        messages = list(session.messages)
+        # Sent as a user turn so the [system, ...history] prefix stays cacheable
         messages.append({
-            "role": "system", 
+            "role": "user",
             "content": """Based on the interview above, generate the final system prompt for the AI agent.
             Format it clearly with markdown headers (# Personality, # Environment, etc.).
             Ensure all sections discussed are included.
@@ -319,14 +425,13 @@ class PromptChatService:
         
         session.is_completed = 1
         self.db.add(generated_prompt)
-        self.db.commit()
-        self.db.refresh(generated_prompt)
+        await asyncio.to_thread(self._commit, generated_prompt)
         
         return generated_prompt
 
     def save_prompt(self, session_id: int, draft_prompt: str, name: str = None) -> GeneratedPrompt:
         """Save the current draft prompt without regeneration."""
-        session = self.db.query(PromptChatSession).filter(PromptChatSession.id == session_id).first()
+        session = self.db.get(PromptChatSession, session_id)
         if not session:
             raise ValueError("Session not found")
         
@@ -351,11 +456,85 @@ class PromptChatService:
         
         return generated_prompt
 
+    async def _prepare_messages(
+        self,
+        session: PromptChatSession,
+        max_turns: int = MAX_HISTORY_TURNS
+    ) -> List[Dict[str, str]]:
+        """Build the OpenAI message list: system prompt, summary of older turns,
+        recent history and the latest draft prompt."""
+        messages = session.messages
+        start = session.summarized_until or 1
+        
+        # Fold the older half of the window into the summary once it overflows
+        if len(messages) - start > 2 * max_turns:
+            new_start = len(messages) - max_turns
+            session.history_summary = await self._summarize(
+                session.history_summary, messages[start:new_start]
+            )
+            session.summarized_until = start = new_start
+        
+        # Stored messages are already in OpenAI's {role, content} shape
+        prepared = [messages[0]]
+        if session.history_summary:
+            prepared.append({"role": "system", "content": f"Summary of the earlier conversation:\n{session.history_summary}"})
+        prepared.extend(messages[start:-1])
+        # Only the latest draft is sent, just before the newest user turn
+        if session.draft_prompt:
+            prepared.append({"role": "system", "content": f"Current draft_prompt:\n{session.draft_prompt}"})
+        prepared.append(messages[-1])
+        return prepared
+
+    async def _summarize(self, previous_summary: Optional[str], messages: List[Dict[str, str]]) -> str:
+        """Summarize dropped conversation turns, extending any earlier summary."""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        if previous_summary:
+            transcript = f"Earlier summary:\n{previous_summary}\n\n{transcript}"
+        
+        response = await self.client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": transcript}
+            ],
+            temperature=0.3
+        )
+        return response.choices[0].message.content
+
+    def _record_assistant_reply(self, session: PromptChatSession, raw_reply: str) -> Optional[Dict[str, Any]]:
+        """Store an assistant reply as its message text and keep its draft prompt on the session.
+        
+        Returns the parsed reply, or None (storing the raw text) if it isn't valid JSON.
+        """
+        try:
+            ai_data = json.loads(raw_reply)
+        except json.JSONDecodeError:
+            self._append_message(session, "assistant", raw_reply)
+            return None
+        
+        self._append_message(session, "assistant", ai_data.get("message", ""))
+        if ai_data.get("draft_prompt"):
+            session.draft_prompt = ai_data["draft_prompt"]
+        return ai_data
+
+    def _append_user_message(self, session: PromptChatSession, content: str):
+        """Append the user's message and commit it before the model is called."""
+        self._append_message(session, "user", content)
+        self.db.commit()
+
+    def _finalize_assistant_message(self, session: PromptChatSession, raw_reply: str) -> Optional[Dict[str, Any]]:
+        """Record the assistant reply and commit the turn."""
+        ai_data = self._record_assistant_reply(session, raw_reply)
+        self.db.commit()
+        return ai_data
+
     def _append_message(self, session: PromptChatSession, role: str, content: str):
-        """Helper to append message to session."""
-        # SQLAlchemy JSON mutation tracking can be tricky, so we copy, append, and reassign
-        messages = list(session.messages)
-        messages.append({"role": role, "content": content})
-        session.messages = messages
+        """Helper to append message to session without committing."""
+        # messages is a MutableList, so in-place appends are tracked by SQLAlchemy
+        session.messages.append({"role": role, "content": content})
+
+    def _commit(self, *instances):
+        """Commit and reload the given instances. Async callers run this via asyncio.to_thread."""
         self.db.commit()
-        self.db.refresh(session)
+        for instance in instances:
+            self.db.refresh(instance)
@@ -1,22 +1,44 @@
 """Prompt generation service using LLM to create system prompts from analysis."""
-import os
+import asyncio
+import hashlib
+import json
 import logging
-from typing import Dict, Any, Optional
-from openai import AsyncOpenAI
+from typing import Dict, Any, List, Optional, Tuple
+from app.services.openai_client import get_openai_client
+from app.services.shared_cache import cache_get, cache_set
 
 logger = logging.getLogger(__name__)
 
+PROMPT_MODEL = "gpt-4o"
+PROMPT_TEMPERATURE = 0.7
+PROMPT_MAX_TOKENS = 2500
+
+# Generated prompts keyed by a content hash of their inputs and LLM settings
+# (stored in Redis so recording jobs in separate RQ work horses share them)
+_PROMPT_CACHE_TTL = 24 * 3600
+
+
+def _prompt_cache_key(kind: str, *parts: Any) -> str:
+    """Hash the inputs and LLM settings of a prompt generation call."""
+    payload = json.dumps(
+        [kind, PROMPT_MODEL, PROMPT_TEMPERATURE, PROMPT_MAX_TOKENS, *parts],
+        sort_keys=True,
+        default=str
+    )
+    return "prompt:cache:" + hashlib.blake2b(payload.encode()).hexdigest()
+
 
 class PromptGeneratorService:
     """Service for generating system prompts from call analysis."""
     
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = get_openai_client()
     
     async def generate_system_prompt(
         self,
         transcript: str,
-        analysis: Dict[str, Any]
+        analysis: Dict[str, Any],
+        use_cache: bool = True
     ) -> str:
         """
         Generate a system prompt based on transcript and analysis.
@@ -24,12 +46,21 @@ class PromptGeneratorService:
         Args:
             transcript: Full transcript text
             analysis: Analysis results containing tonality, hooks, objections, etc.
+            use_cache: Return a previous result for identical inputs if available.
+                The fresh result is cached either way.
             
         Returns:
             Generated system prompt
         """
-        # Build the analysis summary
-        analysis_summary = self._build_analysis_summary(analysis)
+        cache_key = _prompt_cache_key("generate", transcript, analysis)
+        if use_cache:
+            cached = await asyncio.to_thread(cache_get, cache_key)
+            if cached is not None:
+                logger.info("Prompt generation cache hit")
+                return cached
+        
+        # Build the analysis summary and transcript excerpts
+        analysis_summary, key_excerpts = self._build_prompt_context(transcript, analysis)
         
         # Create the generation prompt
         generation_prompt = f"""You are an expert at creating system prompts for AI sales agents. 
@@ -41,7 +72,7 @@ I have analyzed a successful sales call recording and extracted key insights. Yo
 {analysis_summary}
 
 ## Sample Transcript Excerpts
-{self._extract_key_excerpts(transcript, analysis)}
+{key_excerpts}
 
 ## Your Task
 
@@ -62,7 +93,7 @@ Generate the system prompt now:"""
 
         try:
             response = await self.client.chat.completions.create(
-                model="gpt-4o",
+                model=PROMPT_MODEL,
                 messages=[
                     {
                         "role": "system",
@@ -73,27 +104,38 @@ Generate the system prompt now:"""
                         "content": generation_prompt
                     }
                 ],
-                temperature=0.7,
-                max_tokens=2500
+                temperature=PROMPT_TEMPERATURE,
+                max_tokens=PROMPT_MAX_TOKENS
             )
             
-            return response.choices[0].message.content
+            prompt_text = response.choices[0].message.content
+            await asyncio.to_thread(cache_set, cache_key, prompt_text, _PROMPT_CACHE_TTL)
+            return prompt_text
             
         except Exception as e:
             logger.error(f"Error generating prompt: {str(e)}")
             raise
     
-    def _build_analysis_summary(self, analysis: Dict[str, Any]) -> str:
-        """Build a formatted summary of the analysis."""
-        summary_parts = []
+    def _build_prompt_context(
+        self,
+        transcript: str,
+        analysis: Dict[str, Any]
+    ) -> Tuple[str, str]:
+        """Build the analysis summary and key transcript excerpts in a single pass."""
+        get = analysis.get
+        hooks = get("hooks") or []
+        objections = get("objections") or []
+        summary_parts: List[str] = []
+        excerpts: List[str] = []
         
         # Tonality
-        if analysis.get("tonality_description"):
-            summary_parts.append(f"**Tonality**: {analysis['tonality_description']}")
+        tonality = get("tonality_description")
+        if tonality:
+            summary_parts.append(f"**Tonality**: {tonality}")
         
         # Communication Style
-        if analysis.get("communication_style"):
-            style = analysis["communication_style"]
+        style = get("communication_style")
+        if style:
             summary_parts.append(
                 f"**Communication Style**: "
                 f"Formality: {style.get('formality', 'N/A')}, "
@@ -101,69 +143,52 @@ Generate the system prompt now:"""
                 f"Pace: {style.get('pace', 'N/A')}"
             )
         
-        # Hooks
-        if analysis.get("hooks"):
-            hooks_text = "\n".join([f"- {h.get('text', '')}" for h in analysis["hooks"][:5]])
+        # Hooks (summary lists the top 5, excerpts quote the top 3)
+        if hooks:
+            hooks_text = "\n".join(f"- {h.get('text', '')}" for h in hooks[:5])
             summary_parts.append(f"**Effective Hooks**:\n{hooks_text}")
+            excerpts.extend(f"[Opening Hook]: {h['text']}" for h in hooks[:3] if "text" in h)
         
-        # Objections
-        if analysis.get("objections"):
-            obj_text = "\n".join([
+        # Objections (summary lists the top 3, excerpts quote the top 2)
+        if objections:
+            obj_text = "\n".join(
                 f"- Objection: {o.get('objection', '')}\n  Response: {o.get('response', '')}"
-                for o in analysis["objections"][:3]
-            ])
+                for o in objections[:3]
+            )
             summary_parts.append(f"**Objection Handling**:\n{obj_text}")
+            excerpts.extend(
+                f"[Objection Handling]\n"
+                f"Prospect: {o['objection']}\n"
+                f"Rep: {o['response']}"
+                for o in objections[:2]
+                if "objection" in o and "response" in o
+            )
         
         # Key Phrases
-        if analysis.get("key_phrases"):
-            phrases = ", ".join(analysis["key_phrases"][:10])
-            summary_parts.append(f"**Key Phrases**: {phrases}")
+        key_phrases = get("key_phrases")
+        if key_phrases:
+            summary_parts.append(f"**Key Phrases**: {', '.join(key_phrases[:10])}")
         
         # Voice Profile
-        if analysis.get("voice_profile"):
-            vp = analysis["voice_profile"]
+        vp = get("voice_profile")
+        if vp:
             summary_parts.append(
                 f"**Voice Characteristics**: "
                 f"Speaking rate: {vp.get('speaking_rate_wpm', 'N/A')} WPM, "
                 f"Pace: {vp.get('pace', 'N/A')}"
             )
         
-        return "\n\n".join(summary_parts)
-    
-    def _extract_key_excerpts(
-        self, 
-        transcript: str, 
-        analysis: Dict[str, Any]
-    ) -> str:
-        """Extract key excerpts from transcript based on analysis."""
-        excerpts = []
-        
-        # Add hook examples
-        if analysis.get("hooks"):
-            for hook in analysis["hooks"][:3]:
-                if "text" in hook:
-                    excerpts.append(f"[Opening Hook]: {hook['text']}")
-        
-        # Add objection handling examples
-        if analysis.get("objections"):
-            for obj in analysis["objections"][:2]:
-                if "objection" in obj and "response" in obj:
-                    excerpts.append(
-                        f"[Objection Handling]\n"
-                        f"Prospect: {obj['objection']}\n"
-                        f"Rep: {obj['response']}"
-                    )
-        
         # If no specific excerpts, take first 500 chars
         if not excerpts:
             excerpts.append(transcript[:500] + "...")
         
-        return "\n\n".join(excerpts)
+        return "\n\n".join(summary_parts), "\n\n".join(excerpts)
     
     async def refine_prompt(
         self,
         original_prompt: str,
-        feedback: str
+        feedback: str,
+        use_cache: bool = True
     ) -> str:
         """
         Refine an existing prompt based on feedback.
@@ -171,13 +196,22 @@ Generate the system prompt now:"""
         Args:
             original_prompt: The current system prompt
             feedback: User feedback or performance data
+            use_cache: Return a previous result for identical inputs if available.
+                The fresh result is cached either way.
             
         Returns:
             Refined system prompt
         """
+        cache_key = _prompt_cache_key("refine", original_prompt, feedback)
+        if use_cache:
+            cached = await asyncio.to_thread(cache_get, cache_key)
+            if cached is not None:
+                logger.info("Prompt refinement cache hit")
+                return cached
+        
         try:
             response = await self.client.chat.completions.create(
-                model="gpt-4o",
+                model=PROMPT_MODEL,
                 messages=[
                     {
                         "role": "system",
@@ -195,11 +229,13 @@ Feedback/Performance Data:
 Please refine the system prompt to address the feedback while maintaining the core successful patterns. Return only the refined prompt."""
                     }
                 ],
-                temperature=0.7,
-                max_tokens=2500
+                temperature=PROMPT_TEMPERATURE,
+                max_tokens=PROMPT_MAX_TOKENS
             )
             
-            return response.choices[0].message.content
+            refined_prompt = response.choices[0].message.content
+            await asyncio.to_thread(cache_set, cache_key, refined_prompt, _PROMPT_CACHE_TTL)
+            return refined_prompt
             
         except Exception as e:
             logger.error(f"Error refining prompt: {str(e)}")
@@ -0,0 +1,38 @@
+"""Redis-backed cache shared by the API process and RQ workers.
+
+RQ runs every job in a freshly forked work horse, so in-process caches are
+rebuilt per job and never hit in campaign or recording runs; results that
+should be reused across jobs are stored here instead.
+"""
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Optional
+from redis import Redis
+from app.redis_client import create_redis_connection
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def _get_redis() -> Redis:
+    """Return the process-wide Redis connection used for caching."""
+    return create_redis_connection()
+
+
+def cache_get(key: str) -> Optional[Any]:
+    """Return the cached JSON value for key, or None on a miss or Redis error."""
+    try:
+        raw = _get_redis().get(key)
+    except Exception as e:
+        logger.warning("Cache read failed for %s: %s", key, e)
+        return None
+    return json.loads(raw) if raw is not None else None
+
+
+def cache_set(key: str, value: Any, ttl: int):
+    """Store a JSON-serializable value for ttl seconds; errors are logged and ignored."""
+    try:
+        _get_redis().setex(key, ttl, json.dumps(value))
+    except Exception as e:
+        logger.warning("Cache write failed for %s: %s", key, e)
@@ -1,11 +1,44 @@
 """SMS service for sending messages (mock implementation for POC)."""
+import asyncio
 import logging
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Callable, Dict, Any, List, Optional, Tuple
+import httpx
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def _get_twilio_client(account_sid: str, auth_token: str):
+    """Return a shared Twilio client so its HTTP session (and keep-alive connections) is reused.
+    
+    SMSService is created per send, so the client is cached at module level.
+    This only saves work within a process (e.g. the API); each forked RQ job
+    builds its own client.
+    """
+    from twilio.rest import Client
+    return Client(account_sid, auth_token)
+
+
+@lru_cache(maxsize=1)
+def _get_sms_http_client() -> httpx.AsyncClient:
+    """Return the process-wide HTTP client used for async Twilio sends."""
+    return httpx.AsyncClient(
+        base_url="https://api.twilio.com/2010-04-01",
+        timeout=30.0,
+        http2=True,
+        limits=httpx.Limits(max_connections=100)
+    )
+
+
+async def close_sms_http_client():
+    """Close the shared SMS HTTP client if one was created."""
+    if _get_sms_http_client.cache_info().currsize:
+        await _get_sms_http_client().aclose()
+        _get_sms_http_client.cache_clear()
+
+
 class SMSService:
     """Service for sending SMS messages."""
     
@@ -33,9 +66,68 @@ class SMSService:
                 'error': f"Unknown SMS provider: {self.provider}"
             }
     
+    def prepare_bulk(self, from_number: Optional[str] = None) -> Callable[[str, str], Dict[str, Any]]:
+        """
+        Prepare a send function for many messages from the same number.
+        
+        The provider, Twilio client and sender are resolved once, so each
+        call only varies the recipient and body.
+        
+        Args:
+            from_number: Sender number; defaults to TWILIO_PHONE_NUMBER
+        
+        Returns:
+            send(to, message) returning the same dict as send_sms
+        """
+        if self.provider != "twilio" or not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
+            return self.send_sms
+        
+        client = _get_twilio_client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+        from_ = from_number or settings.TWILIO_PHONE_NUMBER
+        
+        def send(to: str, message: str) -> Dict[str, Any]:
+            return self._create_twilio_message(to, message, from_=from_, client=client)
+        
+        return send
+    
+    async def send_sms_async(self, to: str, message: str) -> Dict[str, Any]:
+        """
+        Send an SMS message without blocking the event loop.
+        
+        Args:
+            to: Phone number to send to
+            message: SMS message content
+        
+        Returns:
+            Dict with 'success' and optional 'error'
+        """
+        if self.provider == "mock":
+            return self._send_mock_sms(to, message)
+        elif self.provider == "twilio":
+            return await self._send_twilio_sms_async(to, message)
+        else:
+            return {
+                'success': False,
+                'error': f"Unknown SMS provider: {self.provider}"
+            }
+    
+    async def send_sms_batch(self, messages: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Send many SMS messages concurrently.
+        
+        Args:
+            messages: (to, message) pairs
+        
+        Returns:
+            One result dict per message, in input order
+        """
+        return await asyncio.gather(
+            *(self.send_sms_async(to, message) for to, message in messages)
+        )
+    
     def _send_mock_sms(self, to: str, message: str) -> Dict[str, Any]:
         """Mock SMS sending for POC."""
-        logger.info(f"[MOCK SMS] To: {to}, Message: {message[:50]}...")
+        logger.info("[MOCK SMS] To: %s, Message: %.50s...", to, message)
         return {
             'success': True,
             'message_id': f"mock_{to}_{len(message)}"
@@ -43,22 +135,31 @@ class SMSService:
     
     def _send_twilio_sms(self, to: str, message: str) -> Dict[str, Any]:
         """Send SMS via Twilio (requires configuration)."""
+        if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
+            logger.warning("Twilio not configured, falling back to mock")
+            return self._send_mock_sms(to, message)
+        
+        return self._create_twilio_message(to, message)
+    
+    def _create_twilio_message(
+        self,
+        to: str,
+        message: str,
+        from_: Optional[str] = None,
+        client=None
+    ) -> Dict[str, Any]:
+        """Send one message via the Twilio client; shared by send_sms and prepare_bulk."""
         try:
-            from twilio.rest import Client
-            
-            if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
-                logger.warning("Twilio not configured, falling back to mock")
-                return self._send_mock_sms(to, message)
-            
-            client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+            if client is None:
+                client = _get_twilio_client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
             
             message_obj = client.messages.create(
                 body=message,
-                from_=settings.TWILIO_PHONE_NUMBER,
+                from_=from_ or settings.TWILIO_PHONE_NUMBER,
                 to=to
             )
             
-            logger.info(f"[TWILIO SMS] Sent message {message_obj.sid} to {to}")
+            logger.info("[TWILIO SMS] Sent message %s to %s", message_obj.sid, to)
             
             return {
                 'success': True,
@@ -67,9 +168,49 @@ class SMSService:
             }
             
         except Exception as e:
-            logger.error(f"Error sending Twilio SMS: {str(e)}")
+            logger.error("Error sending Twilio SMS: %s", e)
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    async def _send_twilio_sms_async(self, to: str, message: str) -> Dict[str, Any]:
+        """Send SMS via Twilio's REST API using the shared async HTTP client."""
+        try:
+            if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
+                logger.warning("Twilio not configured, falling back to mock")
+                return self._send_mock_sms(to, message)
+            
+            response = await _get_sms_http_client().post(
+                f"/Accounts/{settings.TWILIO_ACCOUNT_SID}/Messages.json",
+                auth=(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN),
+                data={
+                    'Body': message,
+                    'From': settings.TWILIO_PHONE_NUMBER,
+                    'To': to
+                }
+            )
+            data = response.json()
+            
+            if response.is_error:
+                error = data.get('message', response.reason_phrase)
+                logger.error("Error sending Twilio SMS: %s", error)
+                return {
+                    'success': False,
+                    'error': error
+                }
+            
+            logger.info("[TWILIO SMS] Sent message %s to %s", data['sid'], to)
+            
+            return {
+                'success': True,
+                'message_id': data['sid'],
+                'status': data.get('status')
+            }
+            
+        except Exception as e:
+            logger.error("Error sending Twilio SMS: %s", e)
             return {
                 'success': False,
                 'error': str(e)
             }
-
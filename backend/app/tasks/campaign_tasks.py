@@ -1,77 +1,139 @@
 """Campaign processing tasks for RQ."""
 import logging
-from redis import Redis
+from uuid import uuid4
 from rq import Queue
-from app.config import settings
+from rq.job import Dependency
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, scoped_session
 from app.database import SessionLocal
+from app.redis_client import create_redis_connection
 from app.orchestrator.graph import process_campaign_lead_with_graph
 
 logger = logging.getLogger(__name__)
 
 # Initialize Redis connection
-redis_conn = Redis.from_url(settings.REDIS_URL)
+redis_conn = create_redis_connection()
 campaign_queue = Queue('campaigns', connection=redis_conn)
+lead_queue = Queue('leads', connection=redis_conn)
+# Latency-sensitive voice leads; workers drain this before the bulk 'leads' queue
+lead_queue_high = Queue('leads_high', connection=redis_conn)
+
+# Thread-local sessions over the process-wide engine pool; tasks call remove() when done
+TaskSession = scoped_session(SessionLocal)
+
+# Pause flag checked by lead jobs instead of querying the campaign status
+CAMPAIGN_PAUSE_TTL = 7 * 24 * 3600
+
+# Pending leads are read and enqueued in batches of this size
+LEAD_BATCH_SIZE = 500
+
+# Campaign stats are refreshed every this many processed leads while a run is in progress
+STATS_CHECKPOINT_INTERVAL = 25
+
+# Guards against enqueuing the same campaign twice (e.g. a double-clicked start)
+ENQUEUE_GUARD_TTL = 3600
+
+
+def _pause_key(campaign_id: int) -> str:
+    return f"campaign:{campaign_id}:paused"
+
+
+def _processed_key(campaign_id: int) -> str:
+    return f"campaign:{campaign_id}:processed"
+
+
+def _enqueued_key(campaign_id: int) -> str:
+    return f"campaign:{campaign_id}:enqueued"
+
+
+def _run_key(campaign_id: int) -> str:
+    return f"campaign:{campaign_id}:run"
+
+
+def set_campaign_paused(campaign_id: int):
+    """Flag a campaign as paused so its queued lead jobs skip processing."""
+    redis_conn.setex(_pause_key(campaign_id), CAMPAIGN_PAUSE_TTL, 1)
 
 
 def process_campaign_task(campaign_id: int):
     """
-    Process all pending leads in a campaign.
+    Fan out all pending leads in a campaign to the lead queue.
+    
+    Each lead is processed by its own process_single_lead job; a
+    finalize_campaign job runs once they have all finished.
     
     Args:
         campaign_id: ID of the campaign to process
     """
     from app.models import Campaign, CampaignLead
-    from app.models.campaign import CampaignStatus
+    from app.models.campaign import AgentType, CampaignStatus
     from datetime import datetime
     
-    db = SessionLocal()
+    db = TaskSession()
     
     try:
-        logger.info(f"Starting campaign processing: {campaign_id}")
+        logger.info("Starting campaign processing: %s", campaign_id)
         
         # Get campaign
         campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
         if not campaign:
-            logger.error(f"Campaign {campaign_id} not found")
+            logger.error("Campaign %s not found", campaign_id)
             return
         
+        # Start a new run, superseding the lead jobs and finalizer of any earlier
+        # (paused) run that are still queued
+        run_id = uuid4().hex
+        redis_conn.set(_run_key(campaign_id), run_id)
+        
+        # Only now clear the pause flag and progress counter: jobs from the earlier
+        # run stay stopped by their stale run token
+        redis_conn.delete(_pause_key(campaign_id), _processed_key(campaign_id))
+        
         # Update campaign status
         campaign.status = CampaignStatus.PROCESSING
         campaign.started_at = datetime.now()
         db.commit()
         
-        # Get all pending campaign leads
-        pending_leads = db.query(CampaignLead).filter(
-            CampaignLead.campaign_id == campaign_id,
-            CampaignLead.status == 'pending'
-        ).all()
+        # Stream pending lead IDs in cursor batches and enqueue one job per lead,
+        # so workers can process them in parallel
+        pending_lead_ids = db.scalars(
+            select(CampaignLead.id).where(
+                CampaignLead.campaign_id == campaign_id,
+                CampaignLead.status == 'pending'
+            ).execution_options(yield_per=LEAD_BATCH_SIZE)
+        )
         
-        logger.info(f"Found {len(pending_leads)} pending leads to process")
+        queue = lead_queue_high if campaign.agent_type in (AgentType.VOICE, AgentType.BOTH) else lead_queue
+        jobs = []
+        for batch in pending_lead_ids.partitions():
+            jobs.extend(queue.enqueue_many([
+                Queue.prepare_data(
+                    process_single_lead,
+                    args=(campaign_lead_id, campaign_id, run_id),
+                    timeout='10m'
+                )
+                for campaign_lead_id in batch
+            ]))
         
-        # Process each lead sequentially (can be parallelized later)
-        for campaign_lead in pending_leads:
-            # Check if campaign was paused
-            db.refresh(campaign)
-            if campaign.status == CampaignStatus.PAUSED:
-                logger.info(f"Campaign {campaign_id} paused. Stopping processing.")
-                return
-
-            try:
-                result = process_campaign_lead_with_graph(campaign_lead.id, db)
-                logger.info(f"Processed lead {campaign_lead.id}: {result['status']}")
-            except Exception as e:
-                logger.error(f"Error processing lead {campaign_lead.id}: {str(e)}")
+        logger.info("Found %s pending leads to process", len(jobs))
         
-        # Update campaign status
-        campaign.status = CampaignStatus.COMPLETED
-        campaign.completed_at = datetime.now()
-        campaign.update_stats()
-        db.commit()
+        if not jobs:
+            finalize_campaign(campaign_id, run_id)
+            return
+        
+        # Finalize once every lead job has finished, whether it succeeded or not
+        campaign_queue.enqueue(
+            finalize_campaign,
+            campaign_id,
+            run_id,
+            depends_on=Dependency(jobs=jobs, allow_failure=True),
+            job_timeout='10m'
+        )
         
-        logger.info(f"Campaign {campaign_id} processing complete")
+        logger.info("Enqueued %s lead jobs for campaign %s", len(jobs), campaign_id)
         
     except Exception as e:
-        logger.error(f"Error in campaign task: {str(e)}")
+        logger.error("Error in campaign task: %s", e)
         
         # Update campaign status to failed
         try:
@@ -80,10 +142,125 @@ def process_campaign_task(campaign_id: int):
                 campaign.status = CampaignStatus.FAILED
                 db.commit()
         except Exception as update_error:
-            logger.error(f"Error updating campaign status: {str(update_error)}")
+            logger.error("Error updating campaign status: %s", update_error)
+    
+    finally:
+        TaskSession.remove()
+        redis_conn.delete(_enqueued_key(campaign_id))
+
+
+def process_single_lead(campaign_lead_id: int, campaign_id: int, run_id: str):
+    """
+    Process one campaign lead, unless its campaign has been paused or re-run.
+    
+    Jobs left queued by a paused run belong to a superseded run once the
+    campaign is resumed, so they exit instead of running alongside the new
+    run's jobs. The lead is claimed by moving it from 'pending' to 'processing' in a
+    single UPDATE, so a lead queued more than once is only processed once.
+    
+    Args:
+        campaign_lead_id: ID of the CampaignLead to process
+        campaign_id: ID of the lead's campaign
+        run_id: Token of the fan-out that enqueued this job
+    """
+    from app.models import CampaignLead
+    
+    paused, current_run = redis_conn.mget(_pause_key(campaign_id), _run_key(campaign_id))
+    if paused:
+        logger.info("Campaign %s paused. Skipping lead %s.", campaign_id, campaign_lead_id)
+        return
+    if current_run is None or current_run.decode() != run_id:
+        logger.info("Campaign %s run %s superseded. Skipping lead %s.", campaign_id, run_id, campaign_lead_id)
+        return
+    
+    db = TaskSession()
+    
+    try:
+        claimed = db.execute(
+            update(CampaignLead)
+            .where(CampaignLead.id == campaign_lead_id, CampaignLead.status == 'pending')
+            .values(status='processing')
+        ).rowcount
+        db.commit()
+        if not claimed:
+            logger.info("Lead %s already claimed. Skipping.", campaign_lead_id)
+            return
+        
+        try:
+            result = process_campaign_lead_with_graph(campaign_lead_id, db)
+            logger.info("Processed lead %s: %s", campaign_lead_id, result['status'])
+        except Exception as e:
+            logger.error("Error processing lead %s: %s", campaign_lead_id, e)
+            db.rollback()
+        
+        # Checkpoint campaign stats so progress is visible mid-run
+        processed = redis_conn.incr(_processed_key(campaign_id))
+        if processed % STATS_CHECKPOINT_INTERVAL == 0:
+            _checkpoint_stats(db, campaign_id)
+        
+    except Exception as e:
+        logger.error("Error updating stats for campaign %s: %s", campaign_id, e)
+    
+    finally:
+        TaskSession.remove()
+
+
+def _checkpoint_stats(db: Session, campaign_id: int):
+    """Recompute and commit a campaign's stats."""
+    from app.models import Campaign
+    
+    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+    if campaign:
+        campaign.update_stats()
+        db.commit()
+
+
+def finalize_campaign(campaign_id: int, run_id: str):
+    """
+    Mark a campaign completed and refresh its stats once its leads are processed.
+    
+    A paused campaign is left as is; resuming re-enqueues its remaining leads
+    under a new run, and the finalizer of the earlier run then does nothing.
+    
+    Args:
+        campaign_id: ID of the campaign to finalize
+        run_id: Token of the fan-out this finalizer belongs to
+    """
+    from app.models import Campaign
+    from app.models.campaign import CampaignStatus
+    from datetime import datetime
+    
+    current_run = redis_conn.get(_run_key(campaign_id))
+    if current_run is None or current_run.decode() != run_id:
+        logger.info("Campaign %s run %s superseded. Not finalizing.", campaign_id, run_id)
+        return
+    
+    db = TaskSession()
+    
+    try:
+        campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+        if not campaign:
+            logger.error("Campaign %s not found", campaign_id)
+            return
+        
+        if campaign.status == CampaignStatus.PAUSED:
+            logger.info("Campaign %s paused. Not marking complete.", campaign_id)
+            return
+        
+        # Update campaign status
+        campaign.status = CampaignStatus.COMPLETED
+        campaign.completed_at = datetime.now()
+        campaign.update_stats()
+        db.commit()
+        redis_conn.delete(_processed_key(campaign_id), _run_key(campaign_id))
+        
+        logger.info("Campaign %s processing complete", campaign_id)
+        
+    except Exception as e:
+        logger.error("Error finalizing campaign %s: %s", campaign_id, e)
     
     finally:
-        db.close()
+        TaskSession.remove()
 
 
 def enqueue_campaign_processing(campaign_id: int) -> str:
@@ -94,13 +271,29 @@ def enqueue_campaign_processing(campaign_id: int) -> str:
         campaign_id: ID of the campaign to process
     
     Returns:
-        Job ID
+        Job ID, or the ID of the already-queued job for this campaign
     """
-    job = campaign_queue.enqueue(
-        process_campaign_task,
-        campaign_id,
-        job_timeout='1h'
-    )
-    logger.info(f"Enqueued campaign {campaign_id} processing: job {job.id}")
+    job_id = str(uuid4())
+    # Claim the guard, or return the job holding it. If the guard is released
+    # between SET NX and GET, try to claim it again rather than overwrite it,
+    # so concurrent callers can't both enqueue.
+    while not redis_conn.set(_enqueued_key(campaign_id), job_id, nx=True, ex=ENQUEUE_GUARD_TTL):
+        existing_job_id = redis_conn.get(_enqueued_key(campaign_id))
+        if existing_job_id is not None:
+            logger.info("Campaign %s already queued: job %s", campaign_id, existing_job_id.decode())
+            return existing_job_id.decode()
+    
+    try:
+        job = campaign_queue.enqueue(
+            process_campaign_task,
+            campaign_id,
+            job_id=job_id,
+            job_timeout='1h'
+        )
+    except Exception:
+        redis_conn.delete(_enqueued_key(campaign_id))
+        raise
+    
+    logger.info("Enqueued campaign %s processing: job %s", campaign_id, job.id)
     return job.id
 
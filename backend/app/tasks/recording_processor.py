@@ -1,17 +1,26 @@
-"""Background tasks for processing recordings."""
+"""Recording processing tasks for RQ."""
+import asyncio
 import logging
+from rq import Queue
 from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.redis_client import create_redis_connection
 from app.models.recording import Recording, Transcript, Analysis, GeneratedPrompt, RecordingStatus
-from app.services.elevenlabs import ElevenLabsService
+from app.services.elevenlabs import get_elevenlabs_service, close_elevenlabs_service
 from app.services.analysis import AnalysisService
+from app.services.openai_client import close_openai_client
 from app.services.prompt_generator import PromptGeneratorService
 
 logger = logging.getLogger(__name__)
 
+# Initialize Redis connection
+redis_conn = create_redis_connection()
+recordings_queue = Queue('recordings', connection=redis_conn)
 
-async def process_recording_task(recording_id: int, db: Session):
+
+def process_recording_task(recording_id: int):
     """
-    Background task to process a recording.
+    RQ entrypoint for processing a recording.
     
     Steps:
     1. Transcribe audio
@@ -20,23 +29,47 @@ async def process_recording_task(recording_id: int, db: Session):
     
     Args:
         recording_id: ID of the recording to process
-        db: Database session
     """
+    db = SessionLocal()
+    try:
+        asyncio.run(_run_in_loop(recording_id, db))
+    finally:
+        db.close()
+
+
+async def _run_in_loop(recording_id: int, db: Session):
+    """Process a recording, then release the shared async clients.
+    
+    The clients are bound to this job's event loop, so they are closed here
+    and recreated by the next job.
+    """
+    try:
+        await _process_recording(recording_id, db)
+    finally:
+        await close_elevenlabs_service()
+        await close_openai_client()
+
+
+async def _process_recording(recording_id: int, db: Session):
+    """Transcribe, analyze and generate a prompt for a recording."""
     try:
         # Get recording
-        recording = db.query(Recording).filter(Recording.id == recording_id).first()
+        recording = await asyncio.to_thread(db.get, Recording, recording_id)
         if not recording:
-            logger.error(f"Recording {recording_id} not found")
+            logger.error("Recording %s not found", recording_id)
             return
         
+        # Read before committing; expired attributes would be reloaded on the event loop
+        file_path = recording.file_path
+        
         # Update status
         recording.status = RecordingStatus.TRANSCRIBING
-        db.commit()
+        await asyncio.to_thread(db.commit)
         
         # Step 1: Transcribe
-        logger.info(f"Transcribing recording {recording_id}")
-        elevenlabs = ElevenLabsService()
-        transcript_data = await elevenlabs.transcribe_audio(recording.file_path)
+        logger.info("Transcribing recording %s", recording_id)
+        elevenlabs = get_elevenlabs_service()
+        transcript_data = await elevenlabs.transcribe_audio(file_path)
         
         # Save transcript
         transcript = Transcript(
@@ -45,23 +78,24 @@ async def process_recording_task(recording_id: int, db: Session):
             speaker_segments=transcript_data.get("segments", []),
             confidence_score=transcript_data.get("confidence", None)
         )
-        db.add(transcript)
-        db.commit()
-        db.refresh(transcript)
-        
-        # Update recording duration if available
-        if transcript_data.get("duration"):
-            recording.duration = transcript_data["duration"]
         
-        # Step 2: Analyze
-        logger.info(f"Analyzing recording {recording_id}")
-        recording.status = RecordingStatus.ANALYZING
-        db.commit()
+        def save_transcript():
+            db.add(transcript)
+            # Update recording duration if available
+            if transcript_data.get("duration"):
+                recording.duration = transcript_data["duration"]
+            recording.status = RecordingStatus.ANALYZING
+            db.commit()
         
+        # Step 2: Analyze, overlapping the LLM call with saving the transcript
+        logger.info("Analyzing recording %s", recording_id)
         analysis_service = AnalysisService()
-        analysis_data = await analysis_service.analyze_transcript(
-            transcript.full_text,
-            transcript.speaker_segments or []
+        _, analysis_data = await asyncio.gather(
+            asyncio.to_thread(save_transcript),
+            analysis_service.analyze_transcript(
+                transcript_data["full_text"],
+                transcript_data.get("segments", [])
+            )
         )
         
         # Save analysis
@@ -77,16 +111,20 @@ async def process_recording_task(recording_id: int, db: Session):
             voice_profile=analysis_data.get("voice_profile"),
             recommended_voice_id=analysis_data.get("recommended_voice_id")
         )
-        db.add(analysis)
-        db.commit()
-        db.refresh(analysis)
         
-        # Step 3: Generate prompt
-        logger.info(f"Generating prompt for recording {recording_id}")
+        def save_analysis():
+            db.add(analysis)
+            db.commit()
+        
+        # Step 3: Generate prompt, overlapping the LLM call with saving the analysis
+        logger.info("Generating prompt for recording %s", recording_id)
         prompt_service = PromptGeneratorService()
-        prompt_text = await prompt_service.generate_system_prompt(
-            transcript.full_text,
-            analysis_data
+        _, prompt_text = await asyncio.gather(
+            asyncio.to_thread(save_analysis),
+            prompt_service.generate_system_prompt(
+                transcript_data["full_text"],
+                analysis_data
+            )
         )
         
         # Save generated prompt
@@ -103,22 +141,50 @@ async def process_recording_task(recording_id: int, db: Session):
             },
             is_active=1  # Make it active by default
         )
-        db.add(generated_prompt)
         
-        # Update recording status
-        recording.status = RecordingStatus.COMPLETED
-        db.commit()
+        def save_prompt():
+            db.add(generated_prompt)
+            # Update recording status
+            recording.status = RecordingStatus.COMPLETED
+            db.commit()
+        
+        await asyncio.to_thread(save_prompt)
         
-        logger.info(f"Successfully processed recording {recording_id}")
+        logger.info("Successfully processed recording %s", recording_id)
         
     except Exception as e:
-        logger.error(f"Error processing recording {recording_id}: {str(e)}")
+        logger.error("Error processing recording %s: %s", recording_id, e)
         
         # Update recording with error
-        recording = db.query(Recording).filter(Recording.id == recording_id).first()
-        if recording:
-            recording.status = RecordingStatus.FAILED
-            recording.error_message = str(e)
-            db.commit()
+        await asyncio.to_thread(_mark_failed, db, recording_id, str(e))
         
         raise
+
+
+def _mark_failed(db: Session, recording_id: int, error_message: str):
+    """Record a processing failure on the recording."""
+    db.rollback()
+    recording = db.get(Recording, recording_id)
+    if recording:
+        recording.status = RecordingStatus.FAILED
+        recording.error_message = error_message
+        db.commit()
+
+
+def enqueue_recording_processing(recording_id: int) -> str:
+    """
+    Enqueue a recording for processing.
+    
+    Args:
+        recording_id: ID of the recording to process
+    
+    Returns:
+        Job ID
+    """
+    job = recordings_queue.enqueue(
+        process_recording_task,
+        recording_id,
+        job_timeout='30m'
+    )
+    logger.info("Enqueued recording %s processing: job %s", recording_id, job.id)
+    return job.id
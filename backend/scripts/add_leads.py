@@ -6,6 +6,7 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from sqlalchemy import insert
 from app.database import SessionLocal
 from app.models import Lead
 
@@ -48,18 +49,17 @@ def main():
             print("   Adding new leads to existing ones...")
         
         # Create new leads (skip duplicates by phone)
-        created = 0
-        skipped = 0
-        existing_phones = {lead.phone for lead in db.query(Lead.phone).all()}
-        
-        for lead_data in SAMPLE_LEADS:
-            if lead_data["phone"] in existing_phones:
-                skipped += 1
-                continue
-            lead = Lead(**lead_data)
-            db.add(lead)
-            created += 1
+        candidates = [d["phone"] for d in SAMPLE_LEADS]
+        existing_phones = {
+            phone for (phone,) in db.query(Lead.phone).filter(Lead.phone.in_(candidates))
+        }
+        new_rows = [d for d in SAMPLE_LEADS if d["phone"] not in existing_phones]
+        created = len(new_rows)
+        skipped = len(SAMPLE_LEADS) - created
         
+        # Single multi-row INSERT instead of one per lead
+        if new_rows:
+            db.execute(insert(Lead), new_rows)
         db.commit()
         print(f"✅ Created {created} new leads")
         if skipped > 0:
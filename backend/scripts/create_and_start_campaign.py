@@ -8,6 +8,9 @@ import requests
 # When running locally, use localhost
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000/api")
 
+# Shared session so both requests reuse the same connection
+session = requests.Session()
+
 
 def create_campaign(agent_type: str = "sms", lead_count: int = 5):
     """Create a test campaign."""
@@ -25,7 +28,7 @@ def create_campaign(agent_type: str = "sms", lead_count: int = 5):
     }
     
     try:
-        response = requests.post(f"{API_BASE_URL}/campaigns/", json=payload)
+        response = session.post(f"{API_BASE_URL}/campaigns/", json=payload)
         response.raise_for_status()
         campaign = response.json()
         campaign_id = campaign['id']
@@ -43,7 +46,7 @@ def start_campaign(campaign_id: int):
     print(f"\n▶️  Starting campaign {campaign_id}...")
     
     try:
-        response = requests.post(f"{API_BASE_URL}/campaigns/{campaign_id}/start")
+        response = session.post(f"{API_BASE_URL}/campaigns/{campaign_id}/start")
         response.raise_for_status()
         result = response.json()
         print(f"✅ Campaign started!")
@@ -26,39 +26,25 @@ def migrate_a2a_schema():
             # Start transaction
             trans = conn.begin()
             
-            # 1. Add role column to agents table
+            # 1. Add role column to agents table. The constant default backfills
+            # existing rows without a table rewrite (Postgres 11+), so no UPDATE is needed.
             logger.info("Adding 'role' column to agents table...")
             conn.execute(text("""
                 ALTER TABLE agents 
-                ADD COLUMN IF NOT EXISTS role VARCHAR(50) DEFAULT 'hybrid'
-            """))
-            
-            # Update existing agents to 'hybrid' role
-            conn.execute(text("""
-                UPDATE agents 
-                SET role = 'hybrid' 
-                WHERE role IS NULL
+                ADD COLUMN IF NOT EXISTS role VARCHAR(50) NOT NULL DEFAULT 'hybrid'
             """))
             
             logger.info("✓ Added 'role' column to agents table")
             
-            # 2. Add creative_agent_id to campaigns table
-            logger.info("Adding 'creative_agent_id' column to campaigns table...")
-            conn.execute(text("""
-                ALTER TABLE campaigns 
-                ADD COLUMN IF NOT EXISTS creative_agent_id INTEGER REFERENCES agents(id)
-            """))
-            
-            logger.info("✓ Added 'creative_agent_id' column to campaigns table")
-            
-            # 3. Add deterministic_agent_id to campaigns table
-            logger.info("Adding 'deterministic_agent_id' column to campaigns table...")
+            # 2. Add agent references to campaigns table in a single ALTER
+            logger.info("Adding 'creative_agent_id' and 'deterministic_agent_id' columns to campaigns table...")
             conn.execute(text("""
                 ALTER TABLE campaigns 
+                ADD COLUMN IF NOT EXISTS creative_agent_id INTEGER REFERENCES agents(id),
                 ADD COLUMN IF NOT EXISTS deterministic_agent_id INTEGER REFERENCES agents(id)
             """))
             
-            logger.info("✓ Added 'deterministic_agent_id' column to campaigns table")
+            logger.info("✓ Added 'creative_agent_id' and 'deterministic_agent_id' columns to campaigns table")
             
             # Commit transaction
             trans.commit()
@@ -79,17 +65,22 @@ def seed_a2a_agents():
     db = SessionLocal()
     
     try:
-        # Check if A2A agents already exist
-        existing_creative = db.query(Agent).filter(Agent.role == AgentRole.CREATIVE).first()
-        existing_deterministic = db.query(Agent).filter(Agent.role == AgentRole.DETERMINISTIC).first()
+        # Check which A2A agents already exist in a single query
+        existing_roles = {
+            role for (role,) in db.query(Agent.role).filter(
+                Agent.role.in_([AgentRole.CREATIVE, AgentRole.DETERMINISTIC])
+            ).distinct()
+        }
         
-        if existing_creative and existing_deterministic:
+        if len(existing_roles) == 2:
             logger.info("A2A agents already exist, skipping seed")
             return
         
+        new_agents = []
+        
         # Create creative agent
-        if not existing_creative:
-            creative_agent = Agent(
+        if AgentRole.CREATIVE not in existing_roles:
+            new_agents.append(Agent(
                 name="Creative Sales Agent",
                 description="Specialized in crafting engaging, personalized sales messages",
                 system_prompt="""You are a creative sales assistant focused on engaging conversation.
@@ -104,13 +95,12 @@ Generate messages that feel human and authentic, not robotic.""",
                 role=AgentRole.CREATIVE,
                 capabilities=["sms", "email"],
                 tools=[]
-            )
-            db.add(creative_agent)
+            ))
             logger.info("✓ Created creative agent")
         
         # Create deterministic agent
-        if not existing_deterministic:
-            deterministic_agent = Agent(
+        if AgentRole.DETERMINISTIC not in existing_roles:
+            new_agents.append(Agent(
                 name="Execution Agent",
                 description="Handles tool execution, API calls, and structured operations",
                 system_prompt="""You are a deterministic assistant focused on executing tools and actions.
@@ -128,10 +118,10 @@ You work in tandem with the creative agent to execute their plans.""",
                     {"name": "send_sms", "config": {"provider": "twilio"}},
                     {"name": "make_call", "config": {"provider": "livekit"}},
                 ]
-            )
-            db.add(deterministic_agent)
+            ))
             logger.info("✓ Created deterministic agent")
         
+        db.add_all(new_agents)
         db.commit()
         logger.info("✅ A2A agents seeded successfully!")
         
@@ -17,20 +17,8 @@ def migrate():
             
             conn.execute(text("""
                 UPDATE agents 
-                SET role = 'HYBRID' 
-                WHERE role = 'hybrid';
-            """))
-            
-            conn.execute(text("""
-                UPDATE agents 
-                SET role = 'CREATIVE' 
-                WHERE role = 'creative';
-            """))
-            
-            conn.execute(text("""
-                UPDATE agents 
-                SET role = 'DETERMINISTIC' 
-                WHERE role = 'deterministic';
+                SET role = UPPER(role) 
+                WHERE role IN ('hybrid', 'creative', 'deterministic');
             """))
             
             print("Agent roles updated successfully!")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Database migration script to index pending campaign leads.
+Speeds up the pending-leads lookup at campaign start.
+"""
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from sqlalchemy import text
+from app.database import engine
+from app.config import settings
+
+def run_migration():
+    """Create the partial index on pending campaign leads."""
+    
+    # Partial index: only pending rows are indexed, so it stays small as campaigns complete
+    migration_sql = """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_campaign_leads_campaign_status
+    ON campaign_leads (campaign_id, status)
+    WHERE status = 'pending';
+    """
+    
+    print("🔄 Running campaign_leads index migration...")
+    print(f"📊 Database: {settings.DATABASE_URL.split('@')[-1]}")
+    
+    try:
+        # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(migration_sql))
+            
+            # Verify the index exists and is valid (a failed concurrent build leaves it invalid)
+            result = conn.execute(text("""
+                SELECT i.indisvalid
+                FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE c.relname = 'idx_campaign_leads_campaign_status';
+            """))
+            valid = result.scalar()
+            
+            if valid:
+                print("✅ Migration completed successfully!")
+                print("✅ idx_campaign_leads_campaign_status created")
+            else:
+                print("❌ Migration failed - index missing or invalid")
+                print("   Drop it with DROP INDEX CONCURRENTLY idx_campaign_leads_campaign_status and re-run")
+                return False
+                
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        return False
+    
+    return True
+
+if __name__ == "__main__":
+    success = run_migration()
+    if not success:
+        sys.exit(1)
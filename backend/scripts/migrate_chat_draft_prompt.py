@@ -0,0 +1,22 @@
+"""
+Migration script to add draft_prompt column to prompt_chat_sessions table.
+"""
+from sqlalchemy import create_engine, text
+from app.config import settings
+
+def migrate():
+    print("Starting draft_prompt migration...")
+    
+    # Create engine
+    engine = create_engine(settings.DATABASE_URL)
+    
+    with engine.begin() as conn:
+        print("Adding draft_prompt column to prompt_chat_sessions table...")
+        conn.execute(text("""
+            ALTER TABLE prompt_chat_sessions 
+            ADD COLUMN IF NOT EXISTS draft_prompt TEXT;
+        """))
+        print("Migration completed successfully!")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,23 @@
+"""
+Migration script to add history summary columns to prompt_chat_sessions table.
+"""
+from sqlalchemy import create_engine, text
+from app.config import settings
+
+def migrate():
+    print("Starting chat history summary migration...")
+    
+    # Create engine
+    engine = create_engine(settings.DATABASE_URL)
+    
+    with engine.begin() as conn:
+        print("Adding history_summary and summarized_until columns to prompt_chat_sessions table...")
+        conn.execute(text("""
+            ALTER TABLE prompt_chat_sessions 
+            ADD COLUMN IF NOT EXISTS history_summary TEXT,
+            ADD COLUMN IF NOT EXISTS summarized_until INTEGER;
+        """))
+        print("Migration completed successfully!")
+
+if __name__ == "__main__":
+    migrate()
@@ -1,36 +1,38 @@
 """
 Migration script to add manual_mode column to campaign_leads table.
 """
-from sqlalchemy import create_engine, text
-from app.config import settings
+from sqlalchemy import text
 
 def migrate():
-    print("Starting manual_mode migration...")
+    # Imported here so loading this module doesn't create the engine
+    from app.database import engine
     
-    # Create engine
-    engine = create_engine(settings.DATABASE_URL)
+    print("Starting manual_mode migration...")
     
+    try:
+        _add_manual_mode_column(engine)
+    finally:
+        # Close pooled connections instead of leaving them to process exit
+        engine.dispose()
+
+def _add_manual_mode_column(engine):
     with engine.begin() as conn:
         try:
-            # Check if column exists first
-            print("Checking if manual_mode column exists...")
-            result = conn.execute(text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name='campaign_leads' AND column_name='manual_mode';
+            # Fail fast instead of queueing behind long transactions for the ACCESS EXCLUSIVE lock
+            conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+            conn.execute(text("SET LOCAL statement_timeout = '30s'"))
+            
+            # NOT NULL DEFAULT FALSE (matching CampaignLead.manual_mode): since Postgres 11
+            # a constant default is stored in the catalog, so adding the column doesn't
+            # rewrite the table.
+            # IF NOT EXISTS leaves an existing column untouched, so a manual_mode column
+            # created earlier as nullable stays nullable and without a server default.
+            print("Adding manual_mode column to campaign_leads table...")
+            conn.execute(text("""
+                ALTER TABLE campaign_leads 
+                ADD COLUMN IF NOT EXISTS manual_mode BOOLEAN NOT NULL DEFAULT FALSE;
             """))
             
-            if not result.fetchone():
-                print("Adding manual_mode column to campaign_leads table...")
-                conn.execute(text("""
-                    ALTER TABLE campaign_leads 
-                    ADD COLUMN manual_mode BOOLEAN DEFAULT FALSE;
-                """))
-                print("Column manual_mode added.")
-                conn.commit()
-            else:
-                print("Column manual_mode already exists.")
-                
             print("Migration completed successfully!")
             
         except Exception as e:
@@ -1,36 +1,168 @@
-"""Migration script to create prompt builder tables."""
+"""Migration script to create or upgrade prompt builder tables.
+
+Additive only: missing tables are created, missing columns are added, and
+renamed columns are backfilled in batches before the old column is dropped,
+so existing rows are kept and the tables stay readable throughout.
+
+Pass --fresh to drop and recreate the tables instead (destroys all data).
+"""
+import argparse
 import sys
 import os
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.database import Base, engine
-from app.models.recording import Recording, Transcript, Analysis, GeneratedPrompt, PromptChatSession
+from sqlalchemy import Enum, inspect, text
 
-def migrate():
-    """Create prompt builder tables."""
-    print("Creating prompt builder tables...")
-    
-    # Drop existing tables if they exist (to handle column renames)
-    print("Dropping existing tables if they exist...")
-    GeneratedPrompt.__table__.drop(engine, checkfirst=True)
-    PromptChatSession.__table__.drop(engine, checkfirst=True)
-    Analysis.__table__.drop(engine, checkfirst=True)
-    Transcript.__table__.drop(engine, checkfirst=True)
-    Recording.__table__.drop(engine, checkfirst=True)
+# (table, old column, new column)
+RENAMED_COLUMNS = [
+    ("recordings", "metadata", "recording_metadata"),
+]
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _load_tables():
+    """Import the prompt builder models, in dependency order.
     
-    # Create tables with new schema
-    print("Creating new tables...")
-    Base.metadata.create_all(bind=engine, tables=[
+    Imported lazily so `--help` doesn't load the app or create the engine.
+    """
+    from app.models.recording import Recording, Transcript, Analysis, GeneratedPrompt, PromptChatSession
+    return [
         Recording.__table__,
         Transcript.__table__,
         Analysis.__table__,
         PromptChatSession.__table__,
         GeneratedPrompt.__table__
-    ])
+    ]
+
+
+def add_missing_columns(engine, tables):
+    """Add model columns that don't exist yet."""
+    inspector = inspect(engine)
+
+    with engine.begin() as conn:
+        for table in tables:
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+
+                if isinstance(column.type, Enum):
+                    column.type.create(conn, checkfirst=True)
+
+                # Added as nullable: existing rows have no value to satisfy NOT NULL
+                col_type = column.type.compile(dialect=engine.dialect)
+                print(f"Adding {table.name}.{column.name} ({col_type})...")
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS "{column.name}" {col_type}'
+                ))
+
+
+def backfill_renamed_columns(engine):
+    """Copy renamed columns in batches, committing each batch, then drop the old column."""
+    inspector = inspect(engine)
+
+    for table, old, new in RENAMED_COLUMNS:
+        existing = {col["name"] for col in inspector.get_columns(table)}
+        if old not in existing:
+            continue
+
+        print(f"Backfilling {table}.{new} from {table}.{old}...")
+        total = 0
+        while True:
+            with engine.begin() as conn:
+                updated = conn.execute(text(f"""
+                    UPDATE {table} SET "{new}" = "{old}"
+                    WHERE id IN (
+                        SELECT id FROM {table}
+                        WHERE "{new}" IS NULL AND "{old}" IS NOT NULL
+                        LIMIT {BACKFILL_BATCH_SIZE}
+                    )
+                """)).rowcount
+            total += updated
+            if updated == 0:
+                break
+        print(f"  {total} rows backfilled")
+
+        with engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE {table} DROP COLUMN IF EXISTS "{old}"'))
+        print(f"  Dropped {table}.{old}")
+
+
+def _index_valid(conn, name):
+    """Return pg_index.indisvalid for an index, or None if it doesn't exist."""
+    return conn.execute(text("""
+        SELECT i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name
+    """), {"name": name}).scalar()
+
+
+def create_indexes(engine, tables):
+    """Create every model index that doesn't exist yet, without blocking writes.
+    
+    An interrupted concurrent build leaves an invalid index behind, which
+    IF NOT EXISTS would skip, so invalid indexes are dropped and rebuilt.
+    """
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in tables:
+            for index in sorted(table.indexes, key=lambda i: i.name):
+                # Only plain column indexes are rebuilt correctly from index.columns
+                if len(index.expressions) != len(index.columns):
+                    raise RuntimeError(f"Index {index.name}: expression indexes are not supported")
+                if index.dialect_options["postgresql"]["where"] is not None:
+                    raise RuntimeError(f"Index {index.name}: partial indexes are not supported")
+                
+                if _index_valid(conn, index.name) is False:
+                    print(f"Dropping invalid index {index.name}...")
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+                
+                columns = ", ".join(f'"{col.name}"' for col in index.columns)
+                unique = "UNIQUE " if index.unique else ""
+                print(f"Ensuring index {index.name}...")
+                conn.execute(text(
+                    f"CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON {table.name} ({columns})"
+                ))
+                
+                if not _index_valid(conn, index.name):
+                    raise RuntimeError(
+                        f"Index {index.name} is missing or invalid after build; "
+                        f"drop it with DROP INDEX CONCURRENTLY {index.name} and re-run"
+                    )
+
+
+def drop_tables(engine, tables):
+    """Drop the prompt builder tables, dependents first."""
+    for table in reversed(tables):
+        table.drop(engine, checkfirst=True)
+
+
+def migrate(fresh: bool = False):
+    """Create or upgrade prompt builder tables."""
+    from app.database import Base, engine
     
-    print("✓ Prompt builder tables created successfully!")
+    print("Migrating prompt builder tables...")
+    tables = _load_tables()
+
+    if fresh:
+        print("Dropping existing tables (--fresh)...")
+        drop_tables(engine, tables)
+
+    # Create any tables that don't exist yet (existing tables are left untouched)
+    Base.metadata.create_all(bind=engine, tables=tables, checkfirst=True)
+
+    add_missing_columns(engine, tables)
+    backfill_renamed_columns(engine)
+    create_indexes(engine, tables)
+
+    print("✓ Prompt builder tables migrated successfully!")
 
 if __name__ == "__main__":
-    migrate()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fresh", action="store_true", help="drop and recreate the tables (destroys all data)")
+    args = parser.parse_args()
+    migrate(fresh=args.fresh)
@@ -3,10 +3,36 @@
 import sys
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional
 
+try:
+    import ijson  # optional: lets show_logs print entries as they are parsed
+except ImportError:
+    ijson = None
+
 API_BASE_URL = "http://localhost:8000/api"
 
+# Shared session so polling reuses pooled keep-alive connections.
+# Retry only covers idempotent requests (GETs), so POSTs are never replayed.
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+))
+SESSION.headers.update({"Accept": "application/json", "Accept-Encoding": "gzip, deflate"})
+
+# Campaign polling backs off while nothing changes
+MIN_POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = 15.0
+
+# show_logs output: level markers, and how many lines are written to stdout at once
+INFO_EMOJI = "ℹ️"
+ERR_EMOJI = "❌"
+LOG_WRITE_BATCH = 100
+
 
 def create_test_campaign(agent_type: str = "sms", lead_count: int = 10) -> Optional[int]:
     """Create a test campaign."""
@@ -24,7 +50,7 @@ def create_test_campaign(agent_type: str = "sms", lead_count: int = 10) -> Optio
     }
     
     try:
-        response = requests.post(f"{API_BASE_URL}/campaigns/", json=payload)
+        response = SESSION.post(f"{API_BASE_URL}/campaigns/", json=payload)
         response.raise_for_status()
         campaign = response.json()
         campaign_id = campaign['id']
@@ -40,7 +66,7 @@ def start_campaign(campaign_id: int) -> bool:
     print(f"\n▶️  Starting campaign {campaign_id}...")
     
     try:
-        response = requests.post(f"{API_BASE_URL}/campaigns/{campaign_id}/start")
+        response = SESSION.post(f"{API_BASE_URL}/campaigns/{campaign_id}/start")
         response.raise_for_status()
         result = response.json()
         print(f"✅ Campaign started: Job ID {result.get('job_id')}")
@@ -57,6 +83,9 @@ def monitor_campaign(campaign_id: int, max_wait: int = 300):
     
     start_time = time.time()
     last_status = None
+    last_state = None
+    last_counts = None
+    interval = MIN_POLL_INTERVAL
     
     try:
         while True:
@@ -65,7 +94,7 @@ def monitor_campaign(campaign_id: int, max_wait: int = 300):
                 break
             
             try:
-                response = requests.get(f"{API_BASE_URL}/campaigns/{campaign_id}")
+                response = SESSION.get(f"{API_BASE_URL}/campaigns/{campaign_id}")
                 response.raise_for_status()
                 campaign = response.json()
                 
@@ -75,17 +104,24 @@ def monitor_campaign(campaign_id: int, max_wait: int = 300):
                 if status != last_status:
                     print(f"\n📌 Status: {status}")
                     last_status = status
+                    last_counts = None  # the progress line moved down, so redraw it
                 
-                # Print progress
-                total = stats.get('total_leads', 0)
-                completed = stats.get('completed', 0)
-                failed = stats.get('failed', 0)
-                processing = stats.get('processing', 0)
-                pending = stats.get('pending', 0)
-                
-                progress = f"   Progress: {completed + failed}/{total} | "
-                progress += f"✅ {completed} | ❌ {failed} | ⏳ {processing} | ⏸️  {pending}"
-                print(f"\r{progress}", end='', flush=True)
+                # Print progress, skipping the terminal write when nothing changed
+                counts = (
+                    stats.get('total_leads', 0),
+                    stats.get('completed', 0),
+                    stats.get('failed', 0),
+                    stats.get('processing', 0),
+                    stats.get('pending', 0)
+                )
+                total, completed, failed, processing, pending = counts
+                if counts != last_counts:
+                    print(
+                        f"\r   Progress: {completed + failed}/{total} | "
+                        f"✅ {completed} | ❌ {failed} | ⏳ {processing} | ⏸️  {pending}",
+                        end='', flush=True
+                    )
+                    last_counts = counts
                 
                 # Check if completed
                 if status in ['completed', 'failed']:
@@ -98,7 +134,14 @@ def monitor_campaign(campaign_id: int, max_wait: int = 300):
                     print(f"   SMS Sent: {stats.get('sms_sent', 0)}")
                     break
                 
-                time.sleep(2)
+                # Poll quickly while progress changes, back off while it doesn't
+                state = (status, completed, failed, processing)
+                if state != last_state:
+                    interval = MIN_POLL_INTERVAL
+                else:
+                    interval = min(interval * 1.5, MAX_POLL_INTERVAL)
+                last_state = state
+                time.sleep(interval)
                 
             except Exception as e:
                 print(f"\n❌ Error monitoring: {e}")
@@ -113,21 +156,32 @@ def show_logs(campaign_id: int, limit: int = 20):
     print(f"\n📝 Recent logs for campaign {campaign_id}:\n")
     
     try:
-        response = requests.get(f"{API_BASE_URL}/campaigns/{campaign_id}/logs?limit={limit}")
-        response.raise_for_status()
-        logs = response.json()
+        url = f"{API_BASE_URL}/campaigns/{campaign_id}/logs?limit={limit}"
+        with SESSION.get(url, stream=ijson is not None) as response:
+            response.raise_for_status()
+            # Stream-parse large responses when ijson is available
+            if ijson is not None:
+                response.raw.decode_content = True
+                logs = ijson.items(response.raw, 'item')
+            else:
+                logs = response.json()
+            
+            # The API already caps the response at `limit`, so every entry is shown.
+            # Buffer formatted lines and write them in chunks rather than one print per log
+            count = 0
+            lines = []
+            for log in logs:
+                count += 1
+                emoji = INFO_EMOJI if log.get('level', 'INFO') == "INFO" else ERR_EMOJI
+                lines.append(f"   {emoji} [{log.get('node_name', 'unknown')}] {log.get('message', '')}\n")
+                if len(lines) >= LOG_WRITE_BATCH:
+                    sys.stdout.write("".join(lines))
+                    lines.clear()
+            if lines:
+                sys.stdout.write("".join(lines))
         
-        if not logs:
+        if not count:
             print("   No logs found")
-            return
-        
-        for log in logs[:limit]:
-            level = log.get('level', 'INFO')
-            node = log.get('node_name', 'unknown')
-            message = log.get('message', '')
-            
-            emoji = "ℹ️" if level == "INFO" else "❌"
-            print(f"   {emoji} [{node}] {message}")
             
     except Exception as e:
         print(f"❌ Error fetching logs: {e}")
@@ -1,6 +1,7 @@
 """Seed database with sample data."""
 import logging
-from app.database import SessionLocal
+from sqlalchemy import insert, literal, select
+from app.database import SessionLocal, engine
 from app.models import Lead
 
 logging.basicConfig(level=logging.INFO)
@@ -13,9 +14,9 @@ def seed_leads():
     
     try:
         # Check if leads already exist
-        existing_count = db.query(Lead).count()
-        if existing_count > 0:
-            logger.info(f"Database already has {existing_count} leads. Skipping seed.")
+        has_any = db.execute(select(literal(1)).select_from(Lead).limit(1)).scalar() is not None
+        if has_any:
+            logger.info("Database already has leads; skipping seed.")
             return
         
         sample_leads = [
@@ -31,10 +32,8 @@ def seed_leads():
             {"name": "Henry Wilson", "phone": "+1234567899", "email": "henry@example.com", "company": "Consulting Co"},
         ]
         
-        for lead_data in sample_leads:
-            lead = Lead(**lead_data)
-            db.add(lead)
-        
+        # Single executemany INSERT instead of per-instance ORM adds
+        db.execute(insert(Lead), sample_leads)
         db.commit()
         logger.info(f"Created {len(sample_leads)} sample leads")
         
@@ -47,6 +46,10 @@ def seed_leads():
 
 if __name__ == "__main__":
     logger.info("Seeding database...")
-    seed_leads()
+    try:
+        seed_leads()
+    finally:
+        # Close pooled connections instead of leaving them to process exit
+        engine.dispose()
     logger.info("Done!")
 
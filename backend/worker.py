@@ -1,8 +1,10 @@
 """RQ worker for processing background tasks."""
 import logging
-from redis import Redis
-from rq import Worker, Queue
-from app.config import settings
+import os
+import sys
+from rq import SimpleWorker
+from rq.worker_pool import WorkerPool
+from app.redis_client import create_redis_connection
 
 # Configure logging
 logging.basicConfig(
@@ -11,13 +13,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Redis connection
-redis_conn = Redis.from_url(settings.REDIS_URL)
+# Redis connection used to fetch jobs. Under WorkerPool, rq rebuilds each child's
+# connection from its connection kwargs with a plain ConnectionPool, so the
+# BlockingConnectionPool bounds only apply here and with FORK=0; job code gets
+# bounded pools from its own create_redis_connection() clients.
+redis_conn = create_redis_connection()
 
 if __name__ == '__main__':
-    logger.info("Starting RQ worker...")
+    # Queue names can be passed to run a dedicated worker, e.g. `python worker.py recordings`.
+    # Queues are checked in order, so voice leads ('leads_high') go ahead of bulk SMS leads.
+    queues = sys.argv[1:] or ['campaigns', 'leads_high', 'leads']
     
     # RQ 2.0+ doesn't need Connection context manager
-    worker = Worker(['campaigns'], connection=redis_conn)
-    worker.work()
-
+    if os.getenv('FORK', '1') == '0':
+        # Single in-process worker for local development (no forking)
+        logger.info(f"Starting RQ simple worker for queues: {', '.join(queues)}")
+        SimpleWorker(queues, connection=redis_conn).work()
+    else:
+        num_workers = int(os.getenv('RQ_WORKERS', os.cpu_count() or 4))
+        logger.info(f"Starting {num_workers} RQ workers for queues: {', '.join(queues)}")
+        WorkerPool(queues, connection=redis_conn, num_workers=num_workers).start()
@@ -74,6 +74,14 @@ export function PromptBuilderChat({
         });
 
       setMessages(parsedMessages);
+
+      // Draft prompts are stored on the session rather than in messages
+      if (data.draft_prompt) {
+        setDraftPrompt(data.draft_prompt);
+        if (onDraftUpdate) {
+          onDraftUpdate(data.draft_prompt);
+        }
+      }
     } catch (error) {
       console.error("Failed to start chat", error);
     } finally {